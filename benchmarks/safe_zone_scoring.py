@@ -0,0 +1,83 @@
+"""Micro-benchmark: per-zone Python loop vs batched numpy safe-zone scoring
+
+Run with: python -m video_editor_automation.benchmarks.safe_zone_scoring
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ..core.face_detector import TIE_RANK, SafeZone, score_zones_batch, zones_from_scores
+
+def score_zones_loop(frame_size, faces):
+    """The original calculate_safe_zones: nine dataclasses, nested loops over cells and faces, list sort"""
+    w, h = frame_size
+    grid_h = h // 3
+    grid_w = w // 3
+    zones = []
+    for row in range(3):
+        for col in range(3):
+            x = col * grid_w
+            y = row * grid_h
+            zone = SafeZone(x, y, grid_w, grid_h, score=100.0)
+            for (fx, fy, fw, fh) in faces:
+                if not (x + grid_w < fx or fx + fw < x or y + grid_h < fy or fy + fh < y):
+                    x_overlap = max(0, min(x + grid_w, fx + fw) - max(x, fx))
+                    y_overlap = max(0, min(y + grid_h, fy + fh) - max(y, fy))
+                    zone.score -= (x_overlap * y_overlap / (grid_w * grid_h)) * 100
+            if row == 1 and col == 1:
+                zone.score -= 10
+            if row == 2:
+                zone.score += 15
+            zone.score = max(0, min(100, zone.score))
+            zones.append(zone)
+    # Same tie-break as zones_from_scores (bottom centre first), so the orders are comparable
+    zones.sort(key=lambda z: (-z.score, TIE_RANK[(z.y // grid_h) * 3 + z.x // grid_w]))
+    return zones
+
+def random_faces(rng, frames: int, frame_size, max_faces: int):
+    w, h = frame_size
+    faces_per_frame = []
+    for _ in range(frames):
+        n = int(rng.integers(0, max_faces + 1))
+        sizes = rng.integers(60, min(w, h) // 2, n)
+        faces_per_frame.append([(int(rng.integers(0, w - s)), int(rng.integers(0, h - s)), int(s), int(s))
+                                for s in sizes])
+    return faces_per_frame
+
+def main():
+    parser = argparse.ArgumentParser(description="Safe-zone scoring benchmark")
+    parser.add_argument('--width', type=int, default=1080)
+    parser.add_argument('--height', type=int, default=1920)
+    parser.add_argument('--frames', type=int, default=5000)
+    parser.add_argument('--max-faces', type=int, default=3)
+    args = parser.parse_args()
+
+    frame_size = (args.width, args.height)
+    faces_per_frame = random_faces(np.random.default_rng(0), args.frames, frame_size, args.max_faces)
+
+    start = time.perf_counter()
+    reference = [score_zones_loop(frame_size, faces) for faces in faces_per_frame]
+    loop_us = (time.perf_counter() - start) * 1e6 / args.frames
+
+    start = time.perf_counter()
+    scores = score_zones_batch(frame_size, faces_per_frame)
+    batch_us = (time.perf_counter() - start) * 1e6 / args.frames
+
+    start = time.perf_counter()
+    views = [zones_from_scores(frame_size, row) for row in scores]
+    view_us = (time.perf_counter() - start) * 1e6 / args.frames
+
+    mismatches = sum(
+        [(z.x, z.y, float(z.score)) for z in ref] != [(z.x, z.y, z.score) for z in view]
+        for ref, view in zip(reference, views)
+    )
+    print(f"Frame {args.width}x{args.height}, {args.frames} sampled frames, up to {args.max_faces} faces each")
+    print(f"Per-zone Python loop:     {loop_us:8.2f} us/frame")
+    print(f"Batched numpy scores:     {batch_us:8.2f} us/frame")
+    print(f"  + dataclass view:       {view_us:8.2f} us/frame (only when zones are materialized)")
+    print(f"Speedup (scores only):    {loop_us / max(batch_us, 1e-9):8.1f}x")
+    print(f"Frames with differing zones: {mismatches}")
+
+if __name__ == '__main__':
+    main()
@@ -29,6 +29,84 @@ Respond in JSON format:
 Be conservative - only suggest images that truly add value.
 """
 
+BATCH_CONTENT_ANALYSIS_PROMPT = """You are an expert video editor analyzing speech content to determine what should be visualized.
+
+Analyze EACH of the numbered consecutive speech segments below and determine, per segment:
+1. Should this segment have a visual image overlay?
+2. How important is visualization for this segment? (1-10 score)
+3. If visualization is needed, what should the image show?
+
+Context (previous): "{context_before}"
+
+Speech segments:
+{segments_block}
+
+Context (next): "{context_after}"
+
+Consider:
+- Is something concrete being described (people, places, objects, concepts)?
+- Would an image significantly enhance viewer understanding?
+- Is this moment important enough to warrant replacing video frames?
+- Avoid generating images for abstract concepts or simple statements
+- Judge each segment on its own; neighbouring segments are context
+
+Respond in JSON format, with exactly one entry per numbered segment:
+{{
+    "segments": [
+        {{
+            "index": segment number,
+            "needs_visualization": true/false,
+            "importance_score": 1-10,
+            "reasoning": "brief explanation",
+            "image_prompt": "detailed DALL-E prompt in English" or null,
+            "image_description": "what the image should show" or null
+        }}
+    ]
+}}
+
+Be conservative - only suggest images that truly add value.
+"""
+
+FUSED_PHRASE_ANALYSIS_PROMPT = """You are an expert video editor working on a video (Instagram Reels format). For one on-screen phrase, decide whether it needs an image overlay AND write its caption.
+
+Context (previous): "{context_before}"
+
+Phrase, as numbered speech segments:
+{segments_block}
+
+Context (next): "{context_after}"
+
+VISUALIZATION - determine:
+1. Should this phrase have a visual image overlay?
+2. How important is visualization here? (1-10 score)
+3. If visualization is needed, what should the image show, and which numbered segment it belongs to?
+- Is something concrete being described (people, places, objects, concepts)?
+- Would an image significantly enhance viewer understanding?
+- Avoid generating images for abstract concepts or simple statements
+- Be conservative - only suggest images that truly add value
+
+CAPTION - create a meaningful caption that captures the ESSENCE and KEY MESSAGE of the whole phrase, NOT word-by-word subtitles:
+- Maximum {max_length} characters
+- Make it punchy and memorable
+- Use sentence case or title case
+- Sentiment determines the background: sad/angry/worried = RED, happy/excited/grateful/important = GREEN, neutral = none
+
+Respond in JSON format:
+{{
+    "needs_visualization": true/false,
+    "importance_score": 1-10,
+    "reasoning": "brief explanation",
+    "image_prompt": "detailed DALL-E prompt in English" or null,
+    "image_description": "what the image should show" or null,
+    "visual_segment": number of the segment the image belongs to,
+    "english_text": "Key message or emotion (NOT subtitles)",
+    "sentiment": "important/happy/sad/angry/neutral/excited/grateful/worried",
+    "font_size_modifier": 1.0-1.5,
+    "emphasis_words": ["word1", "word2"],
+    "text_position": "bottom"
+}}
+"""
+
 TEXT_SUMMARIZATION_PROMPT = """You are creating impactful on-screen captions for a video (Instagram Reels format).
 
 Speech segment: "{segment_text}"
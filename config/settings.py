@@ -18,13 +18,37 @@ TEMP_DIR.mkdir(parents=True, exist_ok=True)
 # API Keys (set via environment variable or pass with --api-key)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 
+# Transcription Settings
+AUDIO_EXTRACTION_MODE = "speech"  # "speech" (mono 16 kHz, low bitrate, in memory) or "file" (stereo MP3 in temp/)
+SPEECH_AUDIO_FORMAT = "ogg"  # "ogg" (Opus) or "mp3"
+SPEECH_AUDIO_BITRATE = "24k"
+TRANSCRIPTION_CHUNK_SECONDS = 600  # Audio longer than this is translated in chunks (0 = always one request)
+TRANSCRIPTION_SPLIT_WINDOW = 60  # Seconds before each chunk's target end searched for a silence to cut at
+TRANSCRIPTION_SILENCE_DB = -35  # silencedetect noise floor
+TRANSCRIPTION_SILENCE_MIN_SECONDS = 0.4  # Shortest pause that counts as a cut point
+TRANSCRIPTION_WORKERS = 4  # Chunks translated concurrently
+VAD_ENABLED = False  # Upload only the speech regions found by a local energy-based voice activity detector
+VAD_FRAME_SECONDS = 0.03
+VAD_THRESHOLD_DB = -45  # Frames quieter than this (dBFS RMS) are never speech
+VAD_NOISE_MARGIN_DB = 10  # Speech must also be this far above the quietest 10% of frames...
+VAD_THRESHOLD_CEILING_DB = -35  # ...unless that floor is loud (music/noise bed); the threshold never exceeds this
+VAD_MIN_SPEECH_FRACTION = 0.1  # Less detected speech than this share of the input is treated as a VAD miss
+VAD_PAD_SECONDS = 0.3  # Kept around each speech region so word edges are not clipped
+VAD_MIN_GAP_SECONDS = 1.0  # Shorter non-speech stretches are uploaded anyway
+VAD_JOIN_GAP_SECONDS = 0.3  # Silence inserted between joined speech regions
+
 # Content Analysis Settings
+ANALYSIS_MODEL = "gpt-4o"  # Chat model for segment analysis and text summaries
 MIN_IMPORTANCE_SCORE = 6  # Lower threshold, we'll select top ones
 MAX_IMAGES_TOTAL = 5  # Take top 5 images
 MIN_IMAGES_GUARANTEED = 3  # Minimum 3 images even if low scores
 IMAGE_DISPLAY_DURATION = 2.0  # Each image displays for exactly 2 seconds
 CONTEXT_WINDOW_SECONDS = 30
 MAX_TEXT_LENGTH = 60
+ANALYSIS_MAX_IN_FLIGHT = 8  # Concurrent GPT requests for segment analysis and text summaries
+ANALYSIS_BATCH_SIZE = 8  # Consecutive segments analyzed per request (1 = one request per segment)
+ANALYSIS_BATCH_TOKEN_BUDGET = 1200  # Max estimated tokens of segment text packed into one batch
+ANALYSIS_MODE = "separate"  # "separate" (segment analysis + phrase captions) or "fused" (one request per phrase for both)
 
 # Text Display Settings
 TEXT_FONT_SIZE = 48  # Optimized for phone/reels format
@@ -36,6 +60,8 @@ TEXT_ANIMATION = "word_pairs"  # Show 2 words at a time
 TEXT_WORD_DELAY = 0.4  # Seconds between word pairs appearing
 TEXT_WORDS_PER_CHUNK = 2  # Show 2 words at a time
 TEXT_MAX_WORDS_VISIBLE = 2  # Only 2 words visible at once
+TEXT_OVERLAY_CACHE_SIZE = 64  # Rendered overlay tiles kept in memory (LRU)
+TEXT_OVERLAY_MODE = "ffmpeg"  # "ffmpeg" (overlay filter graph) or "python" (per-frame raw pipe)
 
 # Sentiment-based colors (RGB)
 SENTIMENT_COLORS = {
@@ -51,23 +77,50 @@ SENTIMENT_COLORS = {
 TEXT_POSITION_TOP = 0.15     # 15% from top
 TEXT_POSITION_BOTTOM = 0.75  # 75% from top (leaving space for bottom UI)
 TEXT_POSITION_MIDDLE = 0.5   # Middle
+TEXT_BAND_REACH = 0.15  # Height fraction a caption may extend from its anchor toward the frame centre
+# (top, bottom) height fractions whose faces decide text placement: one band per anchor text can move to
+TEXT_BANDS = [(0.0, TEXT_POSITION_TOP + TEXT_BAND_REACH), (TEXT_POSITION_BOTTOM - TEXT_BAND_REACH, 1.0)]
 
 # Face Detection Settings
 FACE_DETECTION_INTERVAL = 5
+FACE_DETECTION_WORKERS = max(1, os.cpu_count() or 1)  # Processes for sharded detection (1 = serial)
 FACE_DETECTION_MODEL = "opencv"
+FACE_DETECTION_MAX_SIZE = 640  # Longest frame side fed to the detector (0 = source resolution)
+FACE_DETECTION_DECODER = "ffmpeg"  # "ffmpeg" (select+scale gray pipe) or "opencv" (grab/retrieve)
+FACE_DETECTION_ROI = True  # Detect only inside TEXT_BANDS; ignored for the moviepy assembler, which can place text anywhere
+FACE_DETECTION_ROI_MARGIN = 0.10  # Height fraction added around each band for faces straddling its edge
+FACE_DETECTION_ADAPTIVE = True  # Full mode: run the cascade on scene changes/drift only, carry zones in between
+FACE_DETECTION_MAX_RATE = 4.0  # Adaptive mode: at most this many cascade runs per second of video
+SCENE_CUT_THRESHOLD = 30.0  # Mean abs difference (0-255) between consecutive sampled frames that counts as a cut
+SCENE_DRIFT_THRESHOLD = 12.0  # Mean abs difference from the last detected frame that forces a re-detection
+FACE_DETECTION_MODE = "lazy"  # "lazy" (only timestamps the assemblers query) or "full" (every interval-th frame)
+SAFE_ZONE_VOTE_NEIGHBORS = 1  # Lazy mode: frames each side of a queried timestamp that vote on its zones
+SAFE_ZONE_VOTE_SPACING = 0.2  # Seconds between voting frames
 SAFE_ZONE_THRESHOLD = 70
 
 # Image Generation Settings
 DALLE_MODEL = "dall-e-3"
 DALLE_QUALITY = "standard"
 DALLE_SIZE = "1024x1024"
+DALLE_RESPONSE_FORMAT = "b64_json"  # "b64_json" (image inline in the response) or "url" (separate download)
+IMAGE_GENERATION_WORKERS = 5  # Concurrent DALL-E requests
+IMAGE_GENERATION_TIMEOUT = 120  # Seconds per DALL-E request
+IMAGE_DOWNLOAD_TIMEOUT = 60  # Seconds to connect / between bytes when downloading a "url" image
 IMAGE_CACHE_ENABLED = True
+IMAGE_REUSE_THRESHOLD = 1.0  # 1.0 = exact prompts only; below it, reuse a cached image whose prompt's word-set Jaccard similarity reaches this (use 0.85 or more)
+IMAGE_GENERATION_EARLY_START = True  # Generate images during analysis once their selection is certain
 
 # Video Processing Settings
 VIDEO_CODEC = "libx264"
 AUDIO_CODEC = "aac"
 VIDEO_BITRATE = "5000k"
 AUDIO_BITRATE = "192k"
+FFMPEG_ASSEMBLY_MODE = "single_pass"  # "single_pass" (one filter graph) or "segments" (encode, concat, overlay)
+FFMPEG_THREADS_PER_WORKER = 2  # Segments mode: libx264 threads per parallel segment encode
+FFMPEG_SEGMENT_WORKERS = max(1, (os.cpu_count() or 1) // FFMPEG_THREADS_PER_WORKER)  # Segments mode: parallel encodes
+FFMPEG_SMART_CUT = False  # Segments mode: stream-copy keyframe-aligned interiors of CFR H.264 sources whose parameters a probe encode matches exactly
+SMART_CUT_MIN_COPY_SECONDS = 2.0  # Shorter interiors are simply re-encoded
+VIDEO_ASSEMBLER = "moviepy"  # "moviepy" (VideoAssembler) or "ffmpeg" (FFmpegVideoAssembler, see FFMPEG_ASSEMBLY_MODE)
 
 # Transition Settings
 TRANSITION_DURATION = 0.5
@@ -1,7 +1,14 @@
 """Audio processor using OpenAI Whisper"""
+import io
+import re
 import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
 
 try:
     from openai import OpenAI
@@ -13,6 +20,12 @@ from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__, settings.LOG_FILE, settings.LOG_LEVEL)
 
+# An extracted audio file, or an in-memory one whose .name carries the format
+AudioSource = Union[Path, io.BytesIO]
+
+SPEECH_AUDIO_CODECS = {"ogg": "libopus", "mp3": "libmp3lame"}
+VAD_SAMPLE_RATE = 16000
+
 class AudioProcessor:
     def __init__(self, api_key: str = None):
         self.api_key = api_key or settings.OPENAI_API_KEY
@@ -22,6 +35,7 @@ class AudioProcessor:
             raise ImportError("openai package required")
         self.client = OpenAI(api_key=self.api_key)
         self.temp_dir = settings.TEMP_DIR
+        self.vad_stats: Dict[str, float] = {}
         logger.info("Audio processor initialized")
     
     def extract_audio(self, video_path: Path) -> Path:
@@ -36,15 +50,96 @@ class AudioProcessor:
             logger.error(f"FFmpeg error: {e.stderr}")
             raise
     
-    def translate_to_english(self, audio_path: Path) -> Dict:
-        logger.info(f"Translating audio to English: {audio_path.name}")
+    def extract_speech_audio(self, video_path: Path) -> io.BytesIO:
+        """Mono 16 kHz low-bitrate speech audio, piped from ffmpeg into memory (nothing written to temp/)"""
+        audio_format = settings.SPEECH_AUDIO_FORMAT
+        logger.info(f"Extracting speech audio from {video_path.name}")
+        cmd = ['ffmpeg', '-v', 'error', '-i', str(video_path), '-vn', '-ac', '1', '-ar', '16000',
+               '-c:a', SPEECH_AUDIO_CODECS[audio_format], '-b:a', settings.SPEECH_AUDIO_BITRATE,
+               '-f', audio_format, 'pipe:1']
         try:
-            with open(audio_path, 'rb') as audio_file:
+            result = subprocess.run(cmd, capture_output=True, check=True)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpeg error: {e.stderr.decode(errors='replace')}")
+            raise
+        audio = io.BytesIO(result.stdout)
+        # The upload infers the format from the file name
+        audio.name = f"{video_path.stem}_speech.{audio_format}"
+        logger.info(f"Speech audio extracted: {len(result.stdout) / 1024:.0f} KiB in memory")
+        return audio
+    
+    def translate_to_english(self, audio: AudioSource) -> Dict:
+        """Whisper translation of the input, with non-speech stretches cut out first when VAD is enabled"""
+        if not settings.VAD_ENABLED:
+            return self._translate_all(audio)
+        samples = decode_pcm(audio)
+        total = len(samples) / VAD_SAMPLE_RATE
+        regions = speech_regions(samples, VAD_SAMPLE_RATE)
+        speech = sum(end - start for start, end in regions)
+        self.vad_stats = {"audio_seconds": round(total, 1), "speech_seconds": round(speech, 1),
+                          "seconds_skipped": round(total - speech, 1), "speech_regions": len(regions)}
+        logger.info(f"Voice activity: {len(regions)} speech regions, {speech:.1f}s of {total:.1f}s "
+                    f"({total - speech:.1f}s skipped)")
+        # The VAD only ever trims; finding (almost) nothing means it missed, not that the input is silent
+        if speech < settings.VAD_MIN_SPEECH_FRACTION * total or total - speech < settings.VAD_MIN_GAP_SECONDS:
+            self.vad_stats["seconds_skipped"] = 0.0
+            return self._translate_all(audio, total)
+        trimmed = join_regions(samples, VAD_SAMPLE_RATE, regions, Path(audio.name).stem)
+        trimmed_seconds = speech + settings.VAD_JOIN_GAP_SECONDS * (len(regions) - 1)
+        result = remap_timeline(self._translate_all(trimmed, trimmed_seconds), regions,
+                                settings.VAD_JOIN_GAP_SECONDS)
+        # Only a segment Whisper ran across two regions may still span a cut; its start and end are exact
+        spanning = gap_spanning_segments(result["segments"], regions)
+        self.vad_stats["gap_spanning_segments"] = spanning
+        if spanning:
+            logger.warning(f"{spanning} transcribed segments span removed non-speech gaps")
+        return result
+    
+    def _translate_all(self, audio: AudioSource, duration: Optional[float] = None) -> Dict:
+        """Whisper translation of the whole input; long inputs are split at silences and sent in parallel.
+        `duration` skips probing when the caller already knows it"""
+        target = settings.TRANSCRIPTION_CHUNK_SECONDS
+        if target > 0:
+            if duration is None:
+                duration = probe_duration(audio)
+            if duration > target:
+                silences = detect_silences(audio, duration, settings.TRANSCRIPTION_SILENCE_DB,
+                                           settings.TRANSCRIPTION_SILENCE_MIN_SECONDS)
+                chunks = plan_chunks(duration, silences, target, settings.TRANSCRIPTION_SPLIT_WINDOW)
+                return self._translate_chunks(audio, chunks)
+        return self._translate_file(audio)
+    
+    def _translate_chunks(self, audio: AudioSource, chunks: List[Tuple[float, float]]) -> Dict:
+        logger.info(f"Translating {Path(audio.name).name} in {len(chunks)} chunks "
+                    f"({settings.TRANSCRIPTION_WORKERS} in parallel)")
+        chunk_audio, offsets = split_audio(audio, [start for start, _ in chunks[1:]])
+        with ThreadPoolExecutor(max_workers=max(1, settings.TRANSCRIPTION_WORKERS),
+                                thread_name_prefix="whisper") as pool:
+            results = list(pool.map(self._translate_file, chunk_audio))
+        return stitch_translations(results, offsets)
+    
+    def _translate_file(self, audio: AudioSource) -> Dict:
+        name = Path(audio.name).name
+        logger.info(f"Translating audio to English: {name}")
+        try:
+            start = time.perf_counter()
+            if isinstance(audio, io.BytesIO):
+                audio.seek(0)
+                size = len(audio.getbuffer())
                 translation = self.client.audio.translations.create(
                     model="whisper-1",
-                    file=audio_file,
+                    file=audio,
                     response_format="verbose_json"
                 )
+            else:
+                size = audio.stat().st_size
+                with open(audio, 'rb') as audio_file:
+                    translation = self.client.audio.translations.create(
+                        model="whisper-1",
+                        file=audio_file,
+                        response_format="verbose_json"
+                    )
+            logger.info(f"Uploaded {name}: {size / 1024:.0f} KiB, {time.perf_counter() - start:.1f}s until response")
             result = {"text": translation.text, "language": "en", "segments": []}
             if hasattr(translation, 'segments') and translation.segments:
                 for segment in translation.segments:
@@ -87,3 +182,164 @@ class AudioProcessor:
             phrases.append(current_phrase)
         logger.info(f"Created {len(phrases)} phrases from {len(segments)} segments")
         return phrases
+
+def _ffmpeg_input(audio: AudioSource) -> Tuple[str, Optional[bytes]]:
+    """ffmpeg -i argument and stdin data for a file or in-memory audio source"""
+    if isinstance(audio, io.BytesIO):
+        return 'pipe:0', audio.getvalue()
+    return str(audio), None
+
+def probe_duration(audio: AudioSource) -> float:
+    """Duration in seconds from a stream-copy pass: demuxed only, never decoded"""
+    source, data = _ffmpeg_input(audio)
+    cmd = ['ffmpeg', '-hide_banner', '-i', source, '-map', '0:a:0', '-c', 'copy', '-f', 'null', '-']
+    stderr = subprocess.run(cmd, input=data, capture_output=True, check=True).stderr.decode(errors='replace')
+    # Piped input has no container duration; the last progress timestamp is exact either way
+    times = re.findall(r"time=(\d+):(\d+):([\d.]+)", stderr)
+    if not times:
+        return 0.0
+    hours, minutes, seconds = times[-1]
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def detect_silences(audio: AudioSource, duration: float, noise_db: float,
+                    min_duration: float) -> List[Tuple[float, float]]:
+    """[(silence_start, silence_end), ...] from ffmpeg's silencedetect filter"""
+    source, data = _ffmpeg_input(audio)
+    cmd = ['ffmpeg', '-hide_banner', '-nostats', '-i', source,
+           '-af', f"silencedetect=noise={noise_db}dB:d={min_duration}", '-f', 'null', '-']
+    stderr = subprocess.run(cmd, input=data, capture_output=True, check=True).stderr.decode(errors='replace')
+    starts = [float(t) for t in re.findall(r"silence_start: (-?[\d.]+)", stderr)]
+    ends = [float(t) for t in re.findall(r"silence_end: ([\d.]+)", stderr)]
+    # A silence running to the end of the file has no silence_end
+    ends += [duration] * (len(starts) - len(ends))
+    return [(max(0.0, start), end) for start, end in zip(starts, ends)]
+
+def plan_chunks(duration: float, silences: List[Tuple[float, float]], target: float,
+                window: float) -> List[Tuple[float, float]]:
+    """[start, end) chunks of at most `target` seconds, cut in the middle of the latest silence
+    in the last `window` seconds before each target, or at the target if there is none"""
+    chunks = []
+    start = 0.0
+    while duration - start > target:
+        limit = start + target
+        cuts = [(s + e) / 2 for s, e in silences if limit - window <= (s + e) / 2 <= limit and (s + e) / 2 > start]
+        cut = max(cuts) if cuts else limit
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, duration))
+    return chunks
+
+def split_audio(audio: AudioSource, cuts: List[float]) -> Tuple[List[io.BytesIO], List[float]]:
+    """The audio split at `cuts` in one stream-copy pass, as in-memory chunks in the same format,
+    with the start time each chunk actually got (the first packet at or after its cut)"""
+    source, data = _ffmpeg_input(audio)
+    name = Path(audio.name)
+    with tempfile.TemporaryDirectory(prefix="chunks_") as tmp:
+        listing = Path(tmp) / "chunks.csv"
+        cmd = ['ffmpeg', '-v', 'error', '-i', source, '-map', '0:a:0', '-c', 'copy',
+               '-f', 'segment', '-segment_format', name.suffix.lstrip('.'),
+               '-segment_times', ",".join(f"{cut:.3f}" for cut in cuts), '-reset_timestamps', '1',
+               '-segment_list', str(listing), '-segment_list_type', 'csv', str(Path(tmp) / f"%03d{name.suffix}")]
+        subprocess.run(cmd, input=data, capture_output=True, check=True)
+        chunks, offsets = [], []
+        for line in listing.read_text().splitlines():
+            file_name, start, _ = line.split(",")
+            chunk = io.BytesIO((Path(tmp) / file_name).read_bytes())
+            chunk.name = f"{name.stem}_{float(start):.0f}s{name.suffix}"
+            chunks.append(chunk)
+            offsets.append(float(start))
+    return chunks, offsets
+
+def stitch_translations(results: List[Dict], offsets: List[float]) -> Dict:
+    """One transcript from per-chunk results: times shifted by each chunk's offset, ids renumbered"""
+    segments = []
+    for result, offset in zip(results, offsets):
+        for segment in result["segments"]:
+            segments.append(dict(segment, id=len(segments), start=segment["start"] + offset,
+                                 end=segment["end"] + offset))
+    text = " ".join(result["text"].strip() for result in results if result["text"].strip())
+    return {"text": text, "language": "en", "segments": segments}
+
+def decode_pcm(audio: AudioSource) -> np.ndarray:
+    """Mono VAD_SAMPLE_RATE float samples in [-1, 1]"""
+    source, data = _ffmpeg_input(audio)
+    cmd = ['ffmpeg', '-v', 'error', '-i', source, '-vn', '-ac', '1', '-ar', str(VAD_SAMPLE_RATE),
+           '-f', 's16le', 'pipe:1']
+    pcm = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+def speech_regions(samples: np.ndarray, rate: int) -> List[Tuple[float, float]]:
+    """[start, end) seconds of speech by frame energy.
+
+    A frame is speech when its RMS level clears both VAD_THRESHOLD_DB and the
+    quietest decile plus VAD_NOISE_MARGIN_DB, the latter capped at
+    VAD_THRESHOLD_CEILING_DB. Regions are padded by
+    VAD_PAD_SECONDS, and gaps shorter than VAD_MIN_GAP_SECONDS are kept.
+    """
+    frame = max(1, int(settings.VAD_FRAME_SECONDS * rate))
+    n_frames = len(samples) // frame
+    if not n_frames:
+        return []
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    level = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    # A loud bed must not lift the threshold over the speech riding on it
+    noise_floor = min(np.percentile(level, 10) + settings.VAD_NOISE_MARGIN_DB, settings.VAD_THRESHOLD_CEILING_DB)
+    threshold = max(settings.VAD_THRESHOLD_DB, noise_floor)
+    active = np.concatenate([[False], level > threshold, [False]])
+    edges = np.flatnonzero(np.diff(active.astype(np.int8)))
+    duration = len(samples) / rate
+    regions = []
+    for start, end in zip(edges[::2] * frame / rate, edges[1::2] * frame / rate):
+        start = max(0.0, float(start) - settings.VAD_PAD_SECONDS)
+        end = min(duration, float(end) + settings.VAD_PAD_SECONDS)
+        if regions and start - regions[-1][1] < settings.VAD_MIN_GAP_SECONDS:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+def join_regions(samples: np.ndarray, rate: int, regions: List[Tuple[float, float]], stem: str) -> io.BytesIO:
+    """The speech regions back to back, VAD_JOIN_GAP_SECONDS of silence apart, encoded in memory"""
+    gap = np.zeros(int(settings.VAD_JOIN_GAP_SECONDS * rate), dtype=np.float32)
+    pieces = []
+    for start, end in regions:
+        if pieces:
+            pieces.append(gap)
+        pieces.append(samples[int(start * rate):int(end * rate)])
+    pcm = (np.clip(np.concatenate(pieces), -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    audio_format = settings.SPEECH_AUDIO_FORMAT
+    cmd = ['ffmpeg', '-v', 'error', '-f', 's16le', '-ar', str(rate), '-ac', '1', '-i', 'pipe:0',
+           '-c:a', SPEECH_AUDIO_CODECS[audio_format], '-b:a', settings.SPEECH_AUDIO_BITRATE,
+           '-f', audio_format, 'pipe:1']
+    audio = io.BytesIO(subprocess.run(cmd, input=pcm, capture_output=True, check=True).stdout)
+    audio.name = f"{stem}_voiced.{audio_format}"
+    return audio
+
+def remap_timeline(result: Dict, regions: List[Tuple[float, float]], gap: float) -> Dict:
+    """Move segment times from the joined speech audio back onto the original timeline"""
+    lengths = np.array([end - start for start, end in regions])
+    joined_starts = np.concatenate([[0.0], np.cumsum(lengths + gap)[:-1]])
+    original_starts = np.array([start for start, _ in regions])
+
+    def to_original(t: float, is_end: bool) -> float:
+        # An end exactly on a boundary belongs to the region before it
+        k = max(0, int(np.searchsorted(joined_starts, t, side='left' if is_end else 'right')) - 1)
+        offset = t - joined_starts[k]
+        if not is_end and offset >= lengths[k] and k + 1 < len(regions):
+            # A start inside a joining gap belongs to the speech after it, not the silence that was cut
+            return float(original_starts[k + 1])
+        # An end inside a joining gap clamps back to the end of the region before it
+        return float(original_starts[k] + min(max(offset, 0.0), lengths[k]))
+
+    segments = []
+    for segment in result["segments"]:
+        start = to_original(segment["start"], False)
+        # A segment lying wholly inside a joining gap collapses onto the next region's start
+        segments.append(dict(segment, start=start, end=max(start, to_original(segment["end"], True))))
+    return dict(result, segments=segments)
+
+def gap_spanning_segments(segments: List[Dict], regions: List[Tuple[float, float]]) -> int:
+    """Number of segments whose span covers a removed non-speech gap between two regions"""
+    gaps = [(regions[k][1], regions[k + 1][0]) for k in range(len(regions) - 1)]
+    return sum(any(segment["start"] < gap_start and segment["end"] > gap_end for gap_start, gap_end in gaps)
+               for segment in segments)
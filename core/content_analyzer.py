@@ -1,6 +1,9 @@
 """Content analyzer using GPT-4o"""
 import json
-from typing import Dict, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 try:
     from openai import OpenAI
@@ -8,20 +11,117 @@ except ImportError:
     OpenAI = None
 
 from ..config import settings, prompts
+from ..utils.cache_manager import CacheManager
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__, settings.LOG_FILE, settings.LOG_LEVEL)
 
 class ContentAnalyzer:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, cache: CacheManager = None, load_cached: bool = True):
         self.api_key = api_key or settings.OPENAI_API_KEY
         if not self.api_key:
             raise ValueError("OpenAI API key required")
         if OpenAI is None:
             raise ImportError("openai package required")
         self.client = OpenAI(api_key=self.api_key)
+        self.max_in_flight = max(1, settings.ANALYSIS_MAX_IN_FLIGHT)
+        self.latencies: Dict[str, List[float]] = {}
+        self.wall_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Parsed replies are cached by request content; with load_cached=False they are only written
+        self.cache = cache
+        self.load_cached = load_cached
+        self.cache_hits: Dict[str, int] = {}
+        self.cache_misses: Dict[str, int] = {}
         logger.info("Content analyzer initialized")
     
+    def _chat(self, kind: str, **kwargs):
+        """One chat completion, with its latency recorded under `kind`"""
+        start = time.perf_counter()
+        try:
+            return self.client.chat.completions.create(**kwargs)
+        finally:
+            with self._lock:
+                self.latencies.setdefault(kind, []).append(time.perf_counter() - start)
+    
+    def _chat_json(self, kind: str, template: str, messages: List[Dict], temperature: float,
+                   validate: Callable[[Dict], None] = None) -> Dict:
+        """Parsed JSON reply for a chat request, served from the analysis cache when possible.
+        
+        Only replies that are JSON objects and pass `validate` (which raises on a
+        bad reply) are cached; a cached entry that fails it is requested again.
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.analysis_key(template, settings.ANALYSIS_MODEL, temperature, messages)
+            cached = self.cache.load_analysis(key) if self.load_cached else None
+            if cached is not None and _is_valid(cached, validate):
+                with self._lock:
+                    self.cache_hits[kind] = self.cache_hits.get(kind, 0) + 1
+                return cached
+            with self._lock:
+                self.cache_misses[kind] = self.cache_misses.get(kind, 0) + 1
+        response = self._chat(
+            kind,
+            model=settings.ANALYSIS_MODEL,
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=temperature
+        )
+        result = json.loads(response.choices[0].message.content)
+        if not isinstance(result, dict):
+            raise ValueError(f"expected a JSON object, got {type(result).__name__}")
+        if validate is not None:
+            validate(result)
+        if key is not None:
+            self.cache.save_analysis(key, result)
+        return result
+    
+    def _map_in_flight(self, kind: str, fn: Callable, items: Sequence, on_result: Callable = None) -> List:
+        """fn over items with up to max_in_flight requests outstanding; results keep the input order.
+        
+        `on_result` sees each result as soon as it and all earlier ones are done.
+        """
+        start = time.perf_counter()
+        done = 0
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix=kind) as pool:
+            for result in pool.map(fn, items):
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+                done += 1
+                if done % 10 == 0:
+                    logger.info(f"Completed {done}/{len(items)} {kind} requests")
+        self.wall_seconds[kind] = self.wall_seconds.get(kind, 0.0) + time.perf_counter() - start
+        return results
+    
+    def request_stats(self) -> Dict:
+        """Per-kind request count, latency percentiles and wall time"""
+        stats = {}
+        for kind, latencies in self.latencies.items():
+            ordered = sorted(latencies)
+            wall = self.wall_seconds.get(kind, 0.0)
+            stats[kind] = {
+                "requests": len(ordered),
+                "latency_mean": round(sum(ordered) / len(ordered), 2),
+                "latency_p50": round(ordered[len(ordered) // 2], 2),
+                "latency_p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+                "latency_max": round(ordered[-1], 2),
+                "wall_seconds": round(wall, 2),
+                "concurrency": round(sum(ordered) / wall, 2) if wall else 0.0
+            }
+        return stats
+    
+    def cache_stats(self) -> Dict:
+        """Per-kind analysis cache hits, misses and hit rate"""
+        stats = {}
+        for kind in sorted(self.cache_hits.keys() | self.cache_misses.keys()):
+            hits = self.cache_hits.get(kind, 0)
+            misses = self.cache_misses.get(kind, 0)
+            stats[kind] = {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3)}
+        return stats
+    
     def analyze_segment(self, segment: Dict, context_before: str = "", context_after: str = "") -> Dict:
         segment_text = segment.get("text", "")
         logger.debug(f"Analyzing segment: {segment_text[:50]}...")
@@ -31,20 +131,16 @@ class ContentAnalyzer:
             context_after=context_after
         )
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            result = self._chat_json(
+                "analyze",
+                prompts.CONTENT_ANALYSIS_PROMPT,
                 messages=[
                     {"role": "system", "content": "You are an expert video editor analyzing content for visualization opportunities."},
                     {"role": "user", "content": prompt}
                 ],
-                response_format={"type": "json_object"},
                 temperature=0.3
             )
-            result = json.loads(response.choices[0].message.content)
-            result["segment_id"] = segment.get("id")
-            result["start_time"] = segment.get("start")
-            result["end_time"] = segment.get("end")
-            result["original_text"] = segment_text
+            result = _with_segment_fields(result, segment)
             logger.debug(f"Analysis result - Needs viz: {result.get('needs_visualization')}, Score: {result.get('importance_score')}")
             return result
         except Exception as e:
@@ -61,6 +157,36 @@ class ContentAnalyzer:
                 "original_text": segment_text
             }
     
+    def analyze_segment_batch(self, segments: List[Dict], context_before: str = "",
+                              context_after: str = "") -> Optional[List[Dict]]:
+        """Analyze consecutive segments in one request; None if the reply cannot be matched to every segment"""
+        segments_block = "\n".join(f'{n}. "{segment.get("text", "")}"' for n, segment in enumerate(segments, 1))
+        prompt = prompts.BATCH_CONTENT_ANALYSIS_PROMPT.format(
+            segments_block=segments_block,
+            context_before=context_before,
+            context_after=context_after
+        )
+        try:
+            result = self._chat_json(
+                "analyze_batch",
+                prompts.BATCH_CONTENT_ANALYSIS_PROMPT,
+                messages=[
+                    {"role": "system", "content": "You are an expert video editor analyzing content for visualization opportunities."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                validate=lambda reply: _batch_by_index(reply, len(segments))
+            )
+            by_index = _batch_by_index(result, len(segments))
+        except Exception as e:
+            logger.warning(f"Batched analysis of {len(segments)} segments failed, falling back to per-segment calls: {e}")
+            return None
+        results = []
+        for n, segment in enumerate(segments, 1):
+            entry = {k: v for k, v in by_index[n].items() if k != "index"}
+            results.append(_with_segment_fields(entry, segment))
+        return results
+    
     def summarize_for_text_overlay(self, segment: Dict, max_length: int = None) -> Dict:
         max_length = max_length or settings.MAX_TEXT_LENGTH
         segment_text = segment.get("text", "")
@@ -70,16 +196,15 @@ class ContentAnalyzer:
             max_length=max_length
         )
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            result = self._chat_json(
+                "summarize",
+                prompts.TEXT_SUMMARIZATION_PROMPT,
                 messages=[
                     {"role": "system", "content": "You are an expert at creating concise on-screen text."},
                     {"role": "user", "content": prompt}
                 ],
-                response_format={"type": "json_object"},
                 temperature=0.5
             )
-            result = json.loads(response.choices[0].message.content)
             logger.debug(f"Text summarized: {result.get('english_text', '')[:30]}...")
             return result
         except Exception as e:
@@ -89,23 +214,117 @@ class ContentAnalyzer:
                 "emphasis_words": []
             }
     
-    def batch_analyze_segments(self, segments: List[Dict], context_window: int = 2) -> List[Dict]:
-        logger.info(f"Batch analyzing {len(segments)} segments")
-        results = []
-        for i, segment in enumerate(segments):
-            context_before = ""
-            context_after = ""
-            if i > 0:
-                context_segments = segments[max(0, i-context_window):i]
-                context_before = " ".join([s.get("text", "") for s in context_segments])
-            if i < len(segments) - 1:
-                context_segments = segments[i+1:min(len(segments), i+context_window+1)]
-                context_after = " ".join([s.get("text", "") for s in context_segments])
-            analysis = self.analyze_segment(segment, context_before, context_after)
-            results.append(analysis)
-            if (i + 1) % 10 == 0:
-                logger.info(f"Analyzed {i+1}/{len(segments)} segments")
+    def analyze_phrase(self, phrase: Dict, segments: List[Dict], context_before: str = "",
+                       context_after: str = "", max_length: int = None) -> Tuple[Dict, Dict]:
+        """Visualization analysis and overlay caption for one phrase from a single request.
+        
+        `segments` are the phrase's own speech segments; the analysis is tied to
+        the one the model picks as `visual_segment`.
+        """
+        max_length = max_length or settings.MAX_TEXT_LENGTH
+        segments = segments or [{"id": None, "start": phrase.get("start"), "end": phrase.get("end"),
+                                 "text": phrase.get("text", "")}]
+        segments_block = "\n".join(f'{n}. "{segment.get("text", "")}"' for n, segment in enumerate(segments, 1))
+        prompt = prompts.FUSED_PHRASE_ANALYSIS_PROMPT.format(
+            segments_block=segments_block,
+            context_before=context_before,
+            context_after=context_after,
+            max_length=max_length
+        )
+        try:
+            result = self._chat_json(
+                "analyze_fused",
+                prompts.FUSED_PHRASE_ANALYSIS_PROMPT,
+                messages=[
+                    {"role": "system", "content": "You are an expert video editor analyzing content for visualization opportunities and on-screen text."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3
+            )
+        except Exception as e:
+            logger.error(f"Fused phrase analysis failed: {e}")
+            result = {
+                "needs_visualization": False,
+                "importance_score": 0,
+                "reasoning": f"Analysis failed: {str(e)}",
+                "image_prompt": None,
+                "image_description": None,
+                "english_text": phrase.get("text", "")[:max_length],
+                "emphasis_words": []
+            }
+        overlay = {k: result.pop(k) for k in OVERLAY_FIELDS if k in result}
+        try:
+            visual_segment = min(max(int(result.pop("visual_segment", 1)), 1), len(segments))
+        except (TypeError, ValueError):
+            visual_segment = 1
+        return _with_segment_fields(result, segments[visual_segment - 1]), overlay
+    
+    def analyze_phrases(self, phrases: List[Dict], segments: List[Dict], context_window: int = 1,
+                        on_selected: Callable[[Dict], None] = None) -> Tuple[List[Dict], List[Dict]]:
+        """Fused mode: (selected visualization results, one overlay summary per phrase).
+        
+        Replaces batch_analyze_segments plus batch_summarize_for_text_overlay with
+        one request per phrase; `on_selected` works as in batch_analyze_segments.
+        """
+        logger.info(f"Fused analysis of {len(phrases)} phrases ({self.max_in_flight} requests in flight)")
+        segments_by_id = {segment.get("id"): segment for segment in segments}
+        jobs = []
+        for i, phrase in enumerate(phrases):
+            phrase_segments = [segments_by_id[sid] for sid in phrase.get("segment_ids", []) if sid in segments_by_id]
+            jobs.append((phrase, phrase_segments, *_context(phrases, i, i + 1, context_window)))
+        selector = StreamingSelector(len(phrases), on_selected) if on_selected else None
+        fused = self._map_in_flight("analyze_fused", lambda job: self.analyze_phrase(*job), jobs,
+                                    on_result=selector and (lambda item: selector.extend([item[0]])))
+        results = [analysis for analysis, _ in fused]
+        text_summaries = [overlay for _, overlay in fused]
+        return self._select_top_results(results), text_summaries
+    
+    def _analyze_in_batches(self, segments: List[Dict], context_window: int,
+                            on_results: Callable = None) -> List[Dict]:
+        """Analyze windows of consecutive segments per request, falling back per segment on bad replies"""
+        windows = plan_batches(segments, settings.ANALYSIS_BATCH_SIZE, settings.ANALYSIS_BATCH_TOKEN_BUDGET)
+        
+        def run_window(window):
+            start, end = window
+            batch = self.analyze_segment_batch(segments[start:end], *_context(segments, start, end, context_window))
+            if batch is not None:
+                return batch, 0
+            return [self.analyze_segment(segments[i], *_context(segments, i, i + 1, context_window))
+                    for i in range(start, end)], end - start
         
+        batches = self._map_in_flight("analyze_batch", run_window, windows,
+                                      on_result=on_results and (lambda batch: on_results(batch[0])))
+        fallbacks = sum(fallback for _, fallback in batches)
+        logger.info(f"Batched analysis: {len(segments)} segments in {len(windows)} requests "
+                    f"({fallbacks} segments re-analyzed individually)")
+        return [result for batch, _ in batches for result in batch]
+    
+    def batch_summarize_for_text_overlay(self, segments: List[Dict], max_length: int = None) -> List[Dict]:
+        """summarize_for_text_overlay for every segment, concurrently; results in segment order"""
+        logger.info(f"Summarizing {len(segments)} phrases ({self.max_in_flight} requests in flight)")
+        return self._map_in_flight("summarize", lambda segment: self.summarize_for_text_overlay(segment, max_length),
+                                   segments)
+    
+    def batch_analyze_segments(self, segments: List[Dict], context_window: int = 2,
+                               on_selected: Callable[[Dict], None] = None) -> List[Dict]:
+        """Analyze all segments and return the ones selected for images.
+        
+        `on_selected` is called, while analysis is still running, for each result
+        that the rest of the segments can no longer push out of the selection.
+        """
+        logger.info(f"Batch analyzing {len(segments)} segments ({self.max_in_flight} requests in flight)")
+        selector = StreamingSelector(len(segments), on_selected) if on_selected else None
+        # Results come back in segment order, so the stable sort below breaks score ties the same way every run
+        if settings.ANALYSIS_BATCH_SIZE > 1:
+            results = self._analyze_in_batches(segments, context_window, selector and selector.extend)
+        else:
+            jobs = [(segment, *_context(segments, i, i + 1, context_window)) for i, segment in enumerate(segments)]
+            results = self._map_in_flight("analyze", lambda job: self.analyze_segment(*job), jobs,
+                                          on_result=selector and (lambda result: selector.extend([result])))
+        return self._select_top_results(results)
+    
+    def _select_top_results(self, results: List[Dict]) -> List[Dict]:
+        """Top results by importance_score under the MAX/MIN image rules (StreamingSelector mirrors these)"""
         # Sort by importance
         results.sort(key=lambda x: x.get("importance_score", 0), reverse=True)
         
@@ -128,3 +347,98 @@ class ContentAnalyzer:
         logger.info(f"Analysis complete: {len(filtered_results)} images selected (from {len(visualization_candidates)} candidates)")
         return filtered_results
 
+class StreamingSelector:
+    """Running view of _select_top_results over a result stream arriving in segment order.
+    
+    A result is settled once no combination of the still-missing results can
+    push it out of the final selection: they can only outrank it with a higher
+    importance_score (ties go to earlier segments), which is impossible at
+    MAX_IMPORTANCE_SCORE. Settled results are passed to `on_settled` once.
+    The final selection is still computed by _select_top_results; this only
+    decides what is safe to start early.
+    """
+    
+    def __init__(self, total: int, on_settled: Callable[[Dict], None]):
+        self.total = total
+        self.on_settled = on_settled
+        self.results: List[Dict] = []
+        self.settled = set()
+    
+    def extend(self, results: List[Dict]):
+        self.results.extend(results)
+        unknown = self.total - len(self.results)
+        if not unknown:
+            # Nothing left to overlap with; the caller takes the final selection from here
+            return
+        ranked = sorted(range(len(self.results)), key=lambda i: self.results[i].get("importance_score", 0), reverse=True)
+        known_candidates = sum(1 for r in self.results if r.get("needs_visualization"))
+        candidates_above = 0
+        for rank, i in enumerate(ranked):
+            result = self.results[i]
+            is_candidate = bool(result.get("needs_visualization"))
+            # Missing results that could still rank above this one
+            threats = 0 if result.get("importance_score", 0) >= MAX_IMPORTANCE_SCORE else unknown
+            in_top_min = rank + threats < settings.MIN_IMAGES_GUARANTEED
+            if is_candidate:
+                # Top MAX_IMAGES_TOTAL among candidates, and either the candidate branch is certain or it makes the top MIN overall
+                safe = (candidates_above + threats < settings.MAX_IMAGES_TOTAL
+                        and (known_candidates >= settings.MIN_IMAGES_GUARANTEED or in_top_min))
+                candidates_above += 1
+            else:
+                # Only picked by the minimum guarantee, which needs too few candidates overall
+                safe = known_candidates + unknown < settings.MIN_IMAGES_GUARANTEED and in_top_min
+            if safe and i not in self.settled and result.get("start_time", 0) > 0.5:
+                self.settled.add(i)
+                self.on_settled(result)
+
+MAX_IMPORTANCE_SCORE = 10  # Top of the 1-10 range the analysis prompts ask for
+
+OVERLAY_FIELDS = ("english_text", "sentiment", "font_size_modifier", "emphasis_words", "text_position")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token)"""
+    return len(text) // 4 + 1
+
+def plan_batches(segments: List[Dict], batch_size: int, token_budget: int) -> List[Tuple[int, int]]:
+    """Consecutive [start, end) windows of at most batch_size segments and token_budget estimated tokens"""
+    windows = []
+    start, tokens = 0, 0
+    for i, segment in enumerate(segments):
+        cost = estimate_tokens(segment.get("text", ""))
+        if i > start and (i - start >= batch_size or tokens + cost > token_budget):
+            windows.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(segments):
+        windows.append((start, len(segments)))
+    return windows
+
+def _is_valid(result, validate: Optional[Callable[[Dict], None]]) -> bool:
+    if not isinstance(result, dict):
+        return False
+    try:
+        if validate is not None:
+            validate(result)
+    except Exception:
+        return False
+    return True
+
+def _batch_by_index(result: Dict, count: int) -> Dict[int, Dict]:
+    """Batch reply entries keyed by their 1-based index; raises unless they cover 1..count exactly"""
+    by_index = {int(entry["index"]): entry for entry in result["segments"]}
+    if set(by_index) != set(range(1, count + 1)):
+        raise ValueError(f"expected {count} entries, got indices {sorted(by_index)}")
+    return by_index
+
+def _context(segments: List[Dict], start: int, end: int, context_window: int) -> Tuple[str, str]:
+    """Text of up to context_window segments before [start, end) and after it"""
+    context_before = " ".join([s.get("text", "") for s in segments[max(0, start-context_window):start]])
+    context_after = " ".join([s.get("text", "") for s in segments[end:end+context_window]])
+    return context_before, context_after
+
+def _with_segment_fields(result: Dict, segment: Dict) -> Dict:
+    result["segment_id"] = segment.get("id")
+    result["start_time"] = segment.get("start")
+    result["end_time"] = segment.get("end")
+    result["original_text"] = segment.get("text", "")
+    return result
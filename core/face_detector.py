@@ -1,15 +1,23 @@
 """Face detector for smart text placement"""
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
 from ..config import settings
+from .frame_sampler import detection_size, is_constant_frame_rate, probe_video, sample_frames
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__, settings.LOG_FILE, settings.LOG_LEVEL)
 
+HAAR_MIN_FACE = 30  # px at source resolution
+HAAR_WINDOW = 24  # the cascade cannot detect anything smaller than its training window
+GRID = 3  # safe zones form a GRID x GRID grid; score columns are cells in row-major order
+
 @dataclass
 class SafeZone:
     x: int
@@ -18,80 +26,366 @@ class SafeZone:
     height: int
     score: float
 
+def score_zones_batch(frame_size: Tuple[int, int], faces_per_frame: Sequence[Sequence[Tuple[int, int, int, int]]]) -> np.ndarray:
+    """(n_frames, 9) safe-zone scores for many frames at once.
+
+    Each cell starts at 100 and loses the percentage of its area covered by
+    each face; the centre cell loses 10 more, the bottom row gains 15, and
+    the result is clipped to [0, 100]. Faces are subtracted one at a time so
+    the floats match the per-zone loop exactly.
+    """
+    w, h = frame_size
+    grid_w, grid_h = w // GRID, h // GRID
+    n_frames = len(faces_per_frame)
+    max_faces = max((len(faces) for faces in faces_per_frame), default=0)
+    # Pad with empty boxes; they cover nothing, and subtracting 0.0 leaves a score unchanged
+    boxes = np.zeros((n_frames, max_faces, 4), dtype=np.int64)
+    for i, faces in enumerate(faces_per_frame):
+        if len(faces):
+            boxes[i, :len(faces)] = faces
+
+    cols, rows = np.meshgrid(np.arange(GRID), np.arange(GRID))
+    cell_x0 = (cols.ravel() * grid_w)[None, None, :]
+    cell_y0 = (rows.ravel() * grid_h)[None, None, :]
+    fx, fy = boxes[:, :, 0:1], boxes[:, :, 1:2]
+    fx1, fy1 = fx + boxes[:, :, 2:3], fy + boxes[:, :, 3:4]
+    x_overlap = np.maximum(0, np.minimum(cell_x0 + grid_w, fx1) - np.maximum(cell_x0, fx))
+    y_overlap = np.maximum(0, np.minimum(cell_y0 + grid_h, fy1) - np.maximum(cell_y0, fy))
+    area = grid_w * grid_h
+    overlap = (x_overlap * y_overlap) / area * 100 if area else np.zeros(x_overlap.shape)
+
+    scores = np.full((n_frames, GRID * GRID), 100.0)
+    for k in range(max_faces):
+        scores -= overlap[:, k, :]
+    scores[:, GRID + 1] -= 10  # centre cell
+    scores[:, (GRID - 1) * GRID:] += 15  # bottom row
+    return np.clip(scores, 0, 100)
+
+def roi_rows(height: int, bands: Sequence[Tuple[float, float]], margin: float) -> List[Tuple[int, int]]:
+    """Pixel row ranges covering the bands plus margin, merged where they touch"""
+    spans = sorted((max(0, int((top - margin) * height)), min(height, int(round((bottom + margin) * height))))
+                   for top, bottom in bands)
+    merged = []
+    for y0, y1 in spans:
+        if merged and y0 <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], y1))
+        elif y1 > y0:
+            merged.append((y0, y1))
+    return merged
+
+def band_collisions(faces_per_frame: Sequence[Sequence[Tuple[int, int, int, int]]], height: int,
+                    bands: Sequence[Tuple[float, float]]) -> Dict[str, int]:
+    """Number of frames with a face intersecting each text band"""
+    collisions = {}
+    for top, bottom in bands:
+        y0, y1 = top * height, bottom * height
+        collisions[f"{top:.2f}-{bottom:.2f}"] = sum(
+            any(fy < y1 and fy + fh > y0 for (_, fy, _, fh) in faces) for faces in faces_per_frame
+        )
+    return collisions
+
+def roi_enabled() -> bool:
+    """FACE_DETECTION_ROI, except for the moviepy assembler, which may place text anywhere in the frame"""
+    return settings.FACE_DETECTION_ROI and settings.VIDEO_ASSEMBLER != "moviepy"
+
+def roi_variant() -> Optional[str]:
+    """Cache-key suffix for the detection restriction in force (None when whole frames are scanned)"""
+    if not roi_enabled():
+        return None
+    bands = "+".join(f"{top:.2f}-{bottom:.2f}" for top, bottom in settings.TEXT_BANDS)
+    return f"roi{bands}_m{settings.FACE_DETECTION_ROI_MARGIN:.2f}"
+
+def mask_unscanned_cells(scores: np.ndarray, height: int) -> np.ndarray:
+    """Set grid cells the ROI scan did not fully cover to NaN (unknown), not face-free"""
+    if not roi_enabled():
+        return scores
+    rows = roi_rows(height, settings.TEXT_BANDS, settings.FACE_DETECTION_ROI_MARGIN)
+    grid_h = height // GRID
+    for r in range(GRID):
+        if not any(y0 <= r * grid_h and y1 >= (r + 1) * grid_h for y0, y1 in rows):
+            scores[:, r * GRID:(r + 1) * GRID] = np.nan
+    return scores
+
+# Tie-break rank per cell: bottom centre, then top centre, then the rest in row-major order. Clipping
+# at 100 erases the bottom-row bonus in face-free frames, so ties are common and the first zone must not
+# fall to the top-left corner.
+TIE_RANK = {c: rank for rank, c in enumerate([7, 1] + [c for c in range(GRID * GRID) if c not in (7, 1)])}
+
+def zones_from_scores(frame_size: Tuple[int, int], scores: np.ndarray) -> List[SafeZone]:
+    """Dataclass view of one score row, best first (ties by TIE_RANK); NaN cells are skipped"""
+    grid_w, grid_h = frame_size[0] // GRID, frame_size[1] // GRID
+    values = scores.tolist()
+    # NaN != NaN filters unknown cells
+    cells = sorted((c for c in range(len(values)) if values[c] == values[c]), key=lambda c: (-values[c], TIE_RANK[c]))
+    return [SafeZone((c % GRID) * grid_w, (c // GRID) * grid_h, grid_w, grid_h, score=values[c]) for c in cells]
+
+class SceneChangeGate:
+    """Decides, per checked frame, whether the cascade must run or the last faces still hold.
+
+    Frames are compared as small thumbnails by mean absolute difference: a
+    jump between consecutive checks is a cut, and a slow change relative to
+    the last detected frame is drift. Either marks a detection as due; it
+    runs as soon as the FACE_DETECTION_MAX_RATE budget allows.
+    """
+    THUMB_WIDTH = 64
+
+    def __init__(self, fps: float, cut_threshold: float = None, drift_threshold: float = None,
+                 max_rate: float = None):
+        self.cut_threshold = settings.SCENE_CUT_THRESHOLD if cut_threshold is None else cut_threshold
+        self.drift_threshold = settings.SCENE_DRIFT_THRESHOLD if drift_threshold is None else drift_threshold
+        max_rate = settings.FACE_DETECTION_MAX_RATE if max_rate is None else max_rate
+        self.min_gap = fps / max_rate if max_rate > 0 else 0.0  # frames between cascade runs
+        self._previous = None
+        self._reference = None
+        self._last_detection = None
+        self._due = True
+
+    def _thumbnail(self, gray: np.ndarray) -> np.ndarray:
+        h, w = gray.shape[:2]
+        thumb_h = max(1, round(h * self.THUMB_WIDTH / w))
+        return cv2.resize(gray, (self.THUMB_WIDTH, thumb_h), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def should_detect(self, frame_index: int, gray: np.ndarray) -> bool:
+        thumb = self._thumbnail(gray)
+        if self._previous is not None and not self._due:
+            cut = np.abs(thumb - self._previous).mean() > self.cut_threshold
+            drift = np.abs(thumb - self._reference).mean() > self.drift_threshold
+            self._due = cut or drift
+        self._previous = thumb
+        if not self._due:
+            return False
+        if self._last_detection is not None and frame_index - self._last_detection < self.min_gap:
+            return False
+        self._due = False
+        self._reference = thumb
+        self._last_detection = frame_index
+        return True
+
 class FaceDetector:
     def __init__(self, model: str = "opencv"):
         self.model_type = model
+        self.detection_stats = {}
         cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         self.face_cascade = cv2.CascadeClassifier(cascade_path)
         logger.info("Face detector initialized: OpenCV Haar Cascade")
     
     def detect_faces(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-        return [(x, y, w, h) for (x, y, w, h) in faces]
+        return self.detect_faces_gray(gray)
+    
+    def detect_faces_gray(self, gray: np.ndarray, scale: Tuple[float, float] = (1.0, 1.0)) -> List[Tuple[int, int, int, int]]:
+        """Detect on a (possibly downscaled) gray frame; `scale` maps boxes back to source pixels"""
+        sx, sy = scale
+        faces = self._cascade(gray, scale)
+        if sx == 1.0 and sy == 1.0:
+            return [(x, y, w, h) for (x, y, w, h) in faces]
+        return [(round(x * sx), round(y * sy), round(w * sx), round(h * sy)) for (x, y, w, h) in faces]
+    
+    def _cascade(self, gray: np.ndarray, scale: Tuple[float, float]):
+        # Minimum face size is defined in source pixels
+        min_face = max(HAAR_WINDOW, round(HAAR_MIN_FACE / max(scale)))
+        return self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_face, min_face))
+    
+    def detect(self, gray: np.ndarray, scale: Tuple[float, float] = (1.0, 1.0)) -> List[Tuple[int, int, int, int]]:
+        """Detect in the text bands only (see roi_enabled) or over the whole frame"""
+        if not roi_enabled():
+            return self.detect_faces_gray(gray, scale)
+        return self.detect_faces_in_rows(gray, roi_rows(gray.shape[0], settings.TEXT_BANDS,
+                                                        settings.FACE_DETECTION_ROI_MARGIN), scale)
+    
+    def detect_faces_in_rows(self, gray: np.ndarray, rows: List[Tuple[int, int]],
+                             scale: Tuple[float, float] = (1.0, 1.0)) -> List[Tuple[int, int, int, int]]:
+        """Detect only inside full-width row ranges of the frame; boxes come back in frame coordinates"""
+        sx, sy = scale
+        faces = []
+        for y0, y1 in rows:
+            for (x, y, w, h) in self._cascade(gray[y0:y1], scale):
+                faces.append((round(x * sx), round((y + y0) * sy), round(w * sx), round(h * sy)))
+        return faces
     
     def calculate_safe_zones(self, frame: np.ndarray, faces: List[Tuple[int, int, int, int]]) -> List[SafeZone]:
         h, w = frame.shape[:2]
-        grid_h = h // 3
-        grid_w = w // 3
-        zones = []
-        for row in range(3):
-            for col in range(3):
-                x = col * grid_w
-                y = row * grid_h
-                zone = SafeZone(x, y, grid_w, grid_h, score=100.0)
-                for (fx, fy, fw, fh) in faces:
-                    if self._rectangles_overlap(x, y, grid_w, grid_h, fx, fy, fw, fh):
-                        overlap = self._calculate_overlap_percentage(x, y, grid_w, grid_h, fx, fy, fw, fh)
-                        zone.score -= overlap
-                if row == 1 and col == 1:
-                    zone.score -= 10
-                if row == 2:
-                    zone.score += 15
-                zone.score = max(0, min(100, zone.score))
-                zones.append(zone)
-        zones.sort(key=lambda z: z.score, reverse=True)
-        return zones
+        return self.calculate_safe_zones_for_size((w, h), faces)
     
-    def _rectangles_overlap(self, x1: int, y1: int, w1: int, h1: int, x2: int, y2: int, w2: int, h2: int) -> bool:
-        return not (x1 + w1 < x2 or x2 + w2 < x1 or y1 + h1 < y2 or y2 + h2 < y1)
+    def calculate_safe_zones_for_size(self, frame_size: Tuple[int, int],
+                                      faces: List[Tuple[int, int, int, int]]) -> List[SafeZone]:
+        return zones_from_scores(frame_size, score_zones_batch(frame_size, [faces])[0])
     
-    def _calculate_overlap_percentage(self, x1: int, y1: int, w1: int, h1: int, x2: int, y2: int, w2: int, h2: int) -> float:
-        x_overlap = max(0, min(x1 + w1, x2 + w2) - max(x1, x2))
-        y_overlap = max(0, min(y1 + h1, y2 + h2) - max(y1, y2))
-        intersection = x_overlap * y_overlap
-        area1 = w1 * h1
-        if area1 == 0:
-            return 0
-        return (intersection / area1) * 100
+    def _process_range(self, video_path: Path, interval: int, fps: float, frame_size: Tuple[int, int],
+                       det_size: Tuple[int, int], start_frame: int = 0, end_frame: Optional[int] = None,
+                       decoder: str = None, adaptive: bool = False,
+                       total_frames: int = 0) -> Tuple[List[float], List[List[Tuple[int, int, int, int]]], int]:
+        """(timestamps, face boxes per frame, cascade runs) for the interval-th frames in [start_frame, end_frame).
+
+        In adaptive mode the gate checks the same interval-th frames, so it never
+        decodes more than plain sampling; the cascade only runs when the gate asks
+        for it and the other frames carry the faces of the latest detection.
+        """
+        scale = (frame_size[0] / det_size[0], frame_size[1] / det_size[1])
+        gate = SceneChangeGate(fps) if adaptive else None
+        timestamps, faces_per_frame = [], []
+        faces, detections = [], 0
+        # Only sampled frames are decoded to pixels, already gray and at detection size
+        for frame_count, gray in sample_frames(video_path, interval, det_size, fps,
+                                               start_frame, end_frame, decoder=decoder):
+            if gate is None or gate.should_detect(frame_count, gray):
+                faces = self.detect(gray, scale)
+                detections += 1
+            timestamps.append(frame_count / fps)
+            faces_per_frame.append(faces)
+            if total_frames and len(timestamps) % 20 == 0:
+                logger.info(f"Processed {len(timestamps)} frames ({(frame_count/total_frames)*100:.1f}%)")
+        return timestamps, faces_per_frame, detections
     
-    def process_video(self, video_path: Path, interval: int = None) -> Dict[float, List[SafeZone]]:
+    def process_video_scores(self, video_path: Path, interval: int = None,
+                             workers: int = None) -> Tuple[np.ndarray, np.ndarray, Tuple[int, int]]:
+        """(timestamps, (n, 9) zone scores, frame_size) for every interval-th frame"""
         interval = interval or settings.FACE_DETECTION_INTERVAL
+        workers = workers or settings.FACE_DETECTION_WORKERS
         logger.info(f"Processing video for face detection: {video_path.name}")
-        cap = cv2.VideoCapture(str(video_path))
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video: {video_path}")
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        safe_zones_map = {}
-        frame_count = 0
-        processed_count = 0
-        try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                if frame_count % interval == 0:
-                    timestamp = frame_count / fps
-                    faces = self.detect_faces(frame)
-                    safe_zones = self.calculate_safe_zones(frame, faces)
-                    safe_zones_map[timestamp] = safe_zones
-                    processed_count += 1
-                    if processed_count % 20 == 0:
-                        logger.info(f"Processed {processed_count} frames ({(frame_count/total_frames)*100:.1f}%)")
-                frame_count += 1
-        finally:
-            cap.release()
-        logger.info(f"Face detection complete: analyzed {processed_count} frames")
-        return safe_zones_map
+        width, height, fps, total_frames = probe_video(video_path)
+        det_size = detection_size(width, height, settings.FACE_DETECTION_MAX_SIZE)
+        logger.info(f"Detecting on every {interval}th frame at {det_size[0]}x{det_size[1]} (source {width}x{height})")
+        adaptive = settings.FACE_DETECTION_ADAPTIVE
+        shards = plan_shards(total_frames, interval, workers)
+        if len(shards) > 1 and not is_constant_frame_rate(video_path):
+            # Shards start at index-derived seek times, which drift on variable-frame-rate input
+            logger.info("Variable or unknown frame rate, detecting in a single pass instead of shards")
+            shards = [(0, None)]
+        if adaptive and workers > 1 and total_frames > interval:
+            # A gate per shard would force a detection at every shard start; gate the whole timeline instead
+            timestamps, faces_per_frame, detections = self._process_gated_parallel(
+                video_path, interval, fps, (width, height), det_size, workers, total_frames)
+        elif len(shards) <= 1:
+            timestamps, faces_per_frame, detections = self._process_range(
+                video_path, interval, fps, (width, height), det_size, adaptive=adaptive, total_frames=total_frames)
+        else:
+            timestamps, faces_per_frame, detections = self._process_shards(
+                video_path, interval, fps, (width, height), det_size, shards, adaptive)
+        saved = max(0, len(timestamps) - detections)
+        # Score every sampled frame in one batch
+        scores = mask_unscanned_cells(score_zones_batch((width, height), faces_per_frame), height)
+        self.detection_stats = {
+            "sampled_frames": len(timestamps),
+            "detections": detections,
+            "detections_saved": saved
+        }
+        if roi_enabled():
+            rows = roi_rows(det_size[1], settings.TEXT_BANDS, settings.FACE_DETECTION_ROI_MARGIN)
+            coverage = sum(y1 - y0 for y0, y1 in rows) / det_size[1]
+            collisions = band_collisions(faces_per_frame, height, settings.TEXT_BANDS)
+            self.detection_stats.update({"roi_coverage": round(coverage, 2), "band_collisions": collisions})
+            logger.info(f"ROI detection over {coverage:.0%} of the frame; frames with a face in each text band: "
+                        f"{collisions}")
+        logger.info(f"Face detection complete: analyzed {len(timestamps)} frames")
+        if adaptive:
+            logger.info(f"Adaptive detection: {detections} cascade runs for {len(timestamps)} sampled frames "
+                        f"({saved} saved)")
+        return np.array(timestamps, dtype=np.float64), scores, (width, height)
+    
+    def process_video(self, video_path: Path, interval: int = None, workers: int = None) -> Dict[float, List[SafeZone]]:
+        timestamps, scores, frame_size = self.process_video_scores(video_path, interval, workers)
+        return {float(t): zones_from_scores(frame_size, row) for t, row in zip(timestamps, scores)}
+    
+    def _process_gated_parallel(self, video_path: Path, interval: int, fps: float, frame_size: Tuple[int, int],
+                                det_size: Tuple[int, int], workers: int, total_frames: int = 0
+                                ) -> Tuple[List[float], List[List[Tuple[int, int, int, int]]], int]:
+        """Adaptive detection with one serial gate pass and the cascade runs spread over worker processes.
+
+        The gate sees every sampled frame in order, exactly as in the serial
+        pass, so the frames it picks (and the faces carried between them) do
+        not depend on the worker count.
+        """
+        logger.info(f"Gating detection serially, running the cascade on {workers} worker processes")
+        start = time.perf_counter()
+        scale = (frame_size[0] / det_size[0], frame_size[1] / det_size[1])
+        gate = SceneChangeGate(fps)
+        timestamps, sources = [], []  # sources[i]: index of the detection frame i carries
+        futures, pending = [], deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_cascade_worker,
+                                 initargs=(self.model_type,)) as pool:
+            for frame_count, gray in sample_frames(video_path, interval, det_size, fps,
+                                                   decoder=settings.FACE_DETECTION_DECODER):
+                if gate.should_detect(frame_count, gray):
+                    future = pool.submit(_detect_frame, gray, scale)
+                    futures.append(future)
+                    pending.append(future)
+                    # Bound the frames queued in memory when decoding outruns the cascade
+                    while len(pending) > 2 * workers:
+                        pending.popleft().result()
+                timestamps.append(frame_count / fps)
+                sources.append(len(futures) - 1)
+                if total_frames and len(timestamps) % 20 == 0:
+                    logger.info(f"Processed {len(timestamps)} frames ({(frame_count/total_frames)*100:.1f}%)")
+            detected = [future.result() for future in futures]
+        faces_per_frame = [detected[source] for source in sources]
+        wall = time.perf_counter() - start
+        logger.info(f"Gated detection: {len(timestamps)} frames, {len(detected)} cascade runs in {wall:.2f}s wall")
+        return timestamps, faces_per_frame, len(detected)
+    
+    def _process_shards(self, video_path: Path, interval: int, fps: float, frame_size: Tuple[int, int],
+                        det_size: Tuple[int, int], shards: List[Tuple[int, Optional[int]]], adaptive: bool = False
+                        ) -> Tuple[List[float], List[List[Tuple[int, int, int, int]]], int]:
+        """Detect each shard in its own process and concatenate the results in timestamp order"""
+        logger.info(f"Sharding face detection over {len(shards)} worker processes")
+        start = time.perf_counter()
+        decoder = settings.FACE_DETECTION_DECODER
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            futures = [
+                pool.submit(_detect_shard, self.model_type, video_path, interval, fps, frame_size, det_size,
+                            start_frame, end_frame, decoder, adaptive)
+                for start_frame, end_frame in shards
+            ]
+            results = [future.result() for future in futures]
+        wall = time.perf_counter() - start
+        
+        timestamps, faces_per_frame, detections = [], [], 0
+        for n, ((start_frame, end_frame), (shard_times, shard_faces, shard_detections, seconds)) in enumerate(zip(shards, results)):
+            frames = len(shard_times)
+            end_label = end_frame if end_frame is not None else "end"
+            logger.info(f"Shard {n + 1}/{len(shards)} (frames {start_frame}-{end_label}): {frames} frames in "
+                        f"{seconds:.2f}s ({frames / seconds if seconds else 0:.1f} frames/s)")
+            # Shards are contiguous and in order, so concatenation keeps timestamps sorted
+            timestamps.extend(shard_times)
+            faces_per_frame.extend(shard_faces)
+            detections += shard_detections
+        logger.info(f"Sharded detection: {len(timestamps)} frames in {wall:.2f}s wall "
+                    f"({len(timestamps) / wall if wall else 0:.1f} frames/s overall)")
+        return timestamps, faces_per_frame, detections
+
+def plan_shards(total_frames: int, interval: int, workers: int) -> List[Tuple[int, Optional[int]]]:
+    """Contiguous [start_frame, end_frame) ranges starting on sampled frames; the last runs to EOF.
+
+    Boundaries are multiples of `interval`, so every shard samples exactly the
+    frames the serial pass would.
+    """
+    samples = -(-total_frames // interval) if total_frames > 0 else 0
+    workers = max(1, min(workers, samples))
+    if workers == 1:
+        return [(0, None)]
+    bounds = [round(samples * i / workers) * interval for i in range(workers)]
+    return [(start, bounds[i + 1] if i + 1 < workers else None) for i, start in enumerate(bounds)]
+
+def _detect_shard(model: str, video_path: Path, interval: int, fps: float, frame_size: Tuple[int, int],
+                  det_size: Tuple[int, int], start_frame: int, end_frame: Optional[int],
+                  decoder: str, adaptive: bool) -> Tuple[List[float], List[List[Tuple[int, int, int, int]]], int, float]:
+    """Process-pool entry point: (timestamps, faces per frame, cascade runs, seconds) for one shard"""
+    # One shard per core; keep OpenCV from fanning each worker out across all of them
+    cv2.setNumThreads(1)
+    start = time.perf_counter()
+    detector = FaceDetector(model)
+    timestamps, faces_per_frame, detections = detector._process_range(
+        video_path, interval, fps, frame_size, det_size, start_frame, end_frame, decoder=decoder, adaptive=adaptive)
+    return timestamps, faces_per_frame, detections, time.perf_counter() - start
+
+_cascade_worker = None
+
+def _init_cascade_worker(model: str):
+    """Process-pool initializer: one detector per worker, OpenCV kept to a single thread"""
+    global _cascade_worker
+    cv2.setNumThreads(1)
+    _cascade_worker = FaceDetector(model)
 
+def _detect_frame(gray: np.ndarray, scale: Tuple[float, float]) -> List[Tuple[int, int, int, int]]:
+    """Process-pool entry point: face boxes for one gated frame"""
+    return _cascade_worker.detect(gray, scale)
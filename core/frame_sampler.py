@@ -0,0 +1,158 @@
+"""Sampled, downscaled grayscale decode for face detection"""
+import json
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__, settings.LOG_FILE, settings.LOG_LEVEL)
+
+def probe_video(video_path: Path) -> Tuple[int, int, float, int]:
+    """(width, height, fps, total_frames) as decoded, i.e. after any rotation metadata is applied"""
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        ret, frame = cap.read()
+        if not ret:
+            raise ValueError(f"Could not decode video: {video_path}")
+        height, width = frame.shape[:2]
+    finally:
+        cap.release()
+    return width, height, fps, total_frames
+
+def is_constant_frame_rate(video_path: Path) -> bool:
+    """True when ffprobe reports the same nominal and average frame rate; False if unknown.
+
+    Frame-index seeks (time = index / fps) are only exact for constant-frame-rate streams.
+    """
+    cmd = ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+           '-show_entries', 'stream=r_frame_rate,avg_frame_rate', '-of', 'json', str(video_path)]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        stream = json.loads(result.stdout)['streams'][0]
+    except (OSError, subprocess.CalledProcessError, ValueError, KeyError, IndexError) as e:
+        logger.warning(f"Could not probe frame rate of {video_path.name}: {e}")
+        return False
+    rate = stream.get('r_frame_rate')
+    return rate not in (None, '0/0') and rate == stream.get('avg_frame_rate')
+
+def detection_size(width: int, height: int, max_size: int) -> Tuple[int, int]:
+    """Frame size with the longest side capped at max_size (0 = keep the source size)"""
+    longest = max(width, height)
+    if max_size <= 0 or longest <= max_size:
+        return width, height
+    scale = max_size / longest
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def sample_frames_ffmpeg(video_path: Path, interval: int, size: Tuple[int, int], fps: float,
+                         start_frame: int = 0, end_frame: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (frame_index, gray) for every interval-th frame; ffmpeg drops the rest before scaling.
+
+    `start_frame` must be a multiple of `interval`; it is reached with an
+    accurate input seek, half a frame early so rounding cannot skip it. That
+    seek assumes a constant frame rate (see is_constant_frame_rate).
+    """
+    width, height = size
+    cmd = ['ffmpeg', '-v', 'error']
+    if start_frame:
+        cmd += ['-ss', f"{(start_frame - 0.5) / fps:.6f}"]
+    cmd += [
+        '-i', str(video_path),
+        '-map', '0:v:0',
+        '-vf', f"select='not(mod(n,{interval}))',scale={width}:{height}:flags=area,format=gray",
+        '-vsync', '0'
+    ]
+    if end_frame is not None:
+        cmd += ['-frames:v', str(-(-(end_frame - start_frame) // interval))]
+    cmd += ['-f', 'rawvideo', '-pix_fmt', 'gray', '-']
+    frame_bytes = width * height
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        sample = 0
+        while True:
+            data = proc.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield start_frame + sample * interval, np.frombuffer(data, dtype=np.uint8).reshape(height, width)
+            sample += 1
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, stderr=stderr)
+
+def sample_frames_opencv(video_path: Path, interval: int, size: Tuple[int, int],
+                         start_frame: int = 0, end_frame: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (frame_index, gray) for every interval-th frame; skipped frames are grabbed, never retrieved"""
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+    try:
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        frame_index = start_frame
+        while (end_frame is None or frame_index < end_frame) and cap.grab():
+            if frame_index % interval == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield frame_index, _to_gray(frame, size)
+            frame_index += 1
+    finally:
+        cap.release()
+
+def read_frames_at(video_path: Path, frame_indices: Iterable[int], size: Tuple[int, int],
+                   max_gap: int = 120) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (frame_index, gray) for specific frames in ascending order.
+
+    Gaps up to `max_gap` frames are grabbed through; longer ones seek, which
+    re-decodes from the preceding keyframe.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+    try:
+        position = 0  # index of the frame the next grab() returns
+        for index in sorted(set(frame_indices)):
+            if index < position or index - position > max_gap:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                position = index
+            while position < index and cap.grab():
+                position += 1
+            if position < index or not cap.grab():
+                break
+            position += 1
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield index, _to_gray(frame, size)
+    finally:
+        cap.release()
+
+def _to_gray(frame: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if gray.shape[::-1] != tuple(size):
+        gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    return gray
+
+def sample_frames(video_path: Path, interval: int, size: Tuple[int, int], fps: float,
+                  start_frame: int = 0, end_frame: Optional[int] = None,
+                  decoder: str = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """Sampled grayscale frames at `size` from [start_frame, end_frame), from the configured decoder"""
+    decoder = decoder or settings.FACE_DETECTION_DECODER
+    if decoder == "ffmpeg":
+        if shutil.which('ffmpeg'):
+            return sample_frames_ffmpeg(video_path, interval, size, fps, start_frame, end_frame)
+        logger.warning("ffmpeg not found, falling back to OpenCV frame sampling")
+    return sample_frames_opencv(video_path, interval, size, start_frame, end_frame)
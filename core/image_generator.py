@@ -1,8 +1,10 @@
 """Image generator using DALL-E"""
+import base64
 import time
 from pathlib import Path
 from typing import Optional
 import requests
+from requests.adapters import HTTPAdapter
 
 try:
     from openai import OpenAI
@@ -21,12 +23,18 @@ class ImageGenerator:
             raise ValueError("OpenAI API key required")
         if OpenAI is None:
             raise ImportError("openai package required")
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = OpenAI(api_key=self.api_key, timeout=settings.IMAGE_GENERATION_TIMEOUT)
+        # One pooled session shared by the concurrent downloads (requests.Session is safe to share for GETs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, settings.IMAGE_GENERATION_WORKERS))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.output_dir = settings.TEMP_DIR / "generated_images"
         self.output_dir.mkdir(parents=True, exist_ok=True)
         logger.info("Image generator initialized")
     
     def generate_image(self, prompt: str, output_name: str = None, size: str = None, quality: str = None) -> Optional[Path]:
+        """Generate one image; safe to call from several threads at once"""
         size = size or settings.DALLE_SIZE
         quality = quality or settings.DALLE_QUALITY
         logger.info(f"Generating image: {prompt[:50]}...")
@@ -36,24 +44,34 @@ class ImageGenerator:
                 prompt=prompt,
                 size=size,
                 quality=quality,
+                response_format=settings.DALLE_RESPONSE_FORMAT,
                 n=1
             )
-            image_url = response.data[0].url
-            image_data = requests.get(image_url).content
             if output_name:
                 filename = f"{output_name}.png"
             else:
-                timestamp = int(time.time() * 1000)
-                filename = f"generated_{timestamp}.png"
+                filename = f"generated_{time.time_ns()}.png"
             output_path = self.output_dir / filename
-            with open(output_path, 'wb') as f:
-                f.write(image_data)
+            image = response.data[0]
+            if image.b64_json:
+                # The image came inline; no second round trip
+                with open(output_path, 'wb') as f:
+                    f.write(base64.b64decode(image.b64_json))
+            else:
+                self._download(image.url, output_path)
             logger.info(f"Image generated successfully: {output_path.name}")
             return output_path
         except Exception as e:
             logger.error(f"Image generation failed: {e}")
             return None
     
+    def _download(self, url: str, output_path: Path):
+        with self.session.get(url, stream=True, timeout=settings.IMAGE_DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            with open(output_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+    
     def generate_from_analysis(self, analysis_result: dict) -> Optional[Path]:
         if not analysis_result.get("needs_visualization"):
             return None
@@ -0,0 +1,227 @@
+"""Render plan: timeline -> segment specs -> single FFmpeg filter_complex graph"""
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .text_schedule import TextEvent
+
+TRANSITIONS = ["fade", "zoom", "slide_left", "slide_right", "wipe"]
+VIDEO_FADE_DURATION = 0.15
+IMAGE_TRANSITION_DURATION = 0.2
+
+@dataclass
+class SegmentSpec:
+    kind: str  # "video" or "image"
+    name: str  # temp file stem, e.g. video_seg_0 / image_seg_0
+    start: float
+    end: float
+    fade_in: bool = False
+    fade_out: bool = False
+    image_path: Optional[Path] = None
+    transition: str = "fade"
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+def plan_segments(timeline: List[Dict], video_duration: float) -> List[SegmentSpec]:
+    """Split the render timeline into original-video spans and image inserts, in output order"""
+    image_segments = [t for t in timeline if t['type'] in ['ai_image', 'custom_image']]
+    image_segments.sort(key=lambda x: x['start'])
+
+    specs = []
+    current_time = 0.0
+    for i, img_seg in enumerate(image_segments):
+        # Video before image
+        if img_seg['start'] > current_time:
+            specs.append(SegmentSpec("video", f"video_seg_{i}", current_time, img_seg['start'],
+                                     fade_in=(i == 0), fade_out=True))
+        specs.append(SegmentSpec("image", f"image_seg_{i}", img_seg['start'], img_seg['end'],
+                                 image_path=Path(img_seg['data']['image_path']),
+                                 transition=TRANSITIONS[i % len(TRANSITIONS)]))
+        current_time = img_seg['end']
+
+    # Remaining video
+    if current_time < video_duration:
+        specs.append(SegmentSpec("video", "video_seg_final", current_time, video_duration,
+                                 fade_in=True, fade_out=False))
+    return specs
+
+def preceding_keyframe(keyframes: List[float], t: float) -> float:
+    """Latest keyframe at or before `t` (0.0 when the index has none)"""
+    i = bisect_right(keyframes, t) - 1
+    return keyframes[i] if i >= 0 else 0.0
+
+def smart_cut_interior(start: float, end: float, fade_in: bool, fade_out: bool,
+                       keyframes: List[float], min_copy: float) -> Optional[Tuple[float, float]]:
+    """Keyframe-aligned [k1, k2) inside a video span that can be stream-copied, or None.
+
+    The head [start, k1) and tail [k2, end) still need re-encoding: they
+    carry the fades and the frame-exact boundaries.
+    """
+    head_end = start + (VIDEO_FADE_DURATION if fade_in else 0.0)
+    tail_start = end - (VIDEO_FADE_DURATION if fade_out else 0.0)
+    i = bisect_left(keyframes, head_end)
+    j = bisect_right(keyframes, tail_start) - 1
+    if i >= len(keyframes) or j < 0:
+        return None
+    k1, k2 = keyframes[i], keyframes[j]
+    if k2 - k1 < min_copy:
+        return None
+    return k1, k2
+
+# Stream parameters a re-encoded piece must share with the source before copied GOPs can follow it.
+# SPS/PPS need not match: pieces are joined as Annex B with in-band parameter sets (see concatenate_videos),
+# so every GOP carries its own; profile and level still match so the declared ones hold for the whole stream.
+SMART_CUT_MATCH_KEYS = ("codec_name", "profile", "level", "width", "height", "pix_fmt")
+SMART_CUT_SEEK_NUDGE = 0.001
+X264_PROFILES = {
+    "Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high",
+    "High 10": "high10", "High 4:2:2": "high422", "High 4:4:4 Predictive": "high444",
+}
+
+def smart_cut_encode_args(params: Dict) -> Optional[List[str]]:
+    """libx264 arguments reproducing the source's profile, level, pix_fmt and timescale, or None.
+
+    Only constant-frame-rate H.264 qualifies: copied ranges are cut by frame count.
+    """
+    if params.get("codec_name") != "h264":
+        return None
+    if params.get("r_frame_rate") != params.get("avg_frame_rate"):
+        return None
+    profile = X264_PROFILES.get(params.get("profile"))
+    level = params.get("level")
+    time_base = params.get("time_base", "")
+    if profile is None or not isinstance(level, int) or level <= 0 or "/" not in time_base:
+        return None
+    return ['-profile:v', profile, '-level', f"{level / 10:.1f}", '-pix_fmt', params["pix_fmt"],
+            '-video_track_timescale', time_base.split("/")[1]]
+
+def smart_cut_mismatches(source: Dict, encoded: Dict) -> List[str]:
+    """SMART_CUT_MATCH_KEYS on which an encoded piece differs from the source"""
+    return [key for key in SMART_CUT_MATCH_KEYS if source.get(key) is None or source.get(key) != encoded.get(key)]
+
+def video_fade_filter(duration: float, fade_in: bool, fade_out: bool, offset: float = 0.0) -> str:
+    """Fade chain for an original-video span whose first frame has timestamp `offset`"""
+    filters = []
+    if fade_in:
+        filters.append(f"fade=t=in:st={offset}:d={VIDEO_FADE_DURATION}")
+    if fade_out:
+        filters.append(f"fade=t=out:st={offset + duration - VIDEO_FADE_DURATION}:d={VIDEO_FADE_DURATION}")
+    return ','.join(filters) if filters else "null"
+
+def image_transition_filter(transition_type: str, duration: float, video_size: Tuple[int, int],
+                            fps: float, label: str = "") -> str:
+    """Transition chain for an image insert; `label` keeps internal pad names unique in a larger graph"""
+    trans_duration = IMAGE_TRANSITION_DURATION
+    fades = f"fade=t=in:st=0:d={trans_duration},fade=t=out:st={duration-trans_duration}:d={trans_duration}"
+    if transition_type == "slide_left":
+        # Slide from right to left
+        return f"split[main{label}][tmp{label}];[tmp{label}]crop=iw:ih:0:0,fade=t=in:st=0:d={trans_duration}[fg{label}];[main{label}][fg{label}]overlay=x='if(lt(t,{trans_duration}),W*(1-t/{trans_duration}),0)':y=0,fade=t=out:st={duration-trans_duration}:d={trans_duration}"
+    if transition_type == "slide_right":
+        # Slide from left to right
+        return f"split[main{label}][tmp{label}];[tmp{label}]crop=iw:ih:0:0,fade=t=in:st=0:d={trans_duration}[fg{label}];[main{label}][fg{label}]overlay=x='if(lt(t,{trans_duration}),-W*(1-t/{trans_duration}),0)':y=0,fade=t=out:st={duration-trans_duration}:d={trans_duration}"
+    if transition_type == "zoom":
+        # Zoom in effect
+        return f"zoompan=z='if(lt(time,{trans_duration}),1+(time/{trans_duration})*0.2,1.2)':d={int(duration*fps)}:s={video_size[0]}x{video_size[1]},fade=t=out:st={duration-trans_duration}:d={trans_duration}"
+    # "fade", "wipe" (wipe from top currently falls back to a fade) and unknown types
+    return fades
+
+def tile_paths(tiles: List[Tuple[TextEvent, Tuple[Path, Tuple[int, int]]]]) -> List[Path]:
+    """Distinct tile images in first-use order; each becomes one FFmpeg input"""
+    return list(dict.fromkeys(tile_path for _, (tile_path, _) in tiles))
+
+def overlay_filters(tiles: List[Tuple[TextEvent, Tuple[Path, Tuple[int, int]]]], base_label: str,
+                    first_input: int, out_label: str) -> List[str]:
+    """Chain one time-gated overlay per text event.
+
+    Distinct tile images are FFmpeg inputs first_input, first_input + 1, ... in
+    tile_paths order; an image shown by several events is fanned out with `split`.
+    """
+    inputs = {tile_path: first_input + i for i, tile_path in enumerate(tile_paths(tiles))}
+    uses = {}
+    for _, (tile_path, _) in tiles:
+        uses[tile_path] = uses.get(tile_path, 0) + 1
+    filters = []
+    sources = {}
+    for tile_path, idx in inputs.items():
+        if uses[tile_path] == 1:
+            sources[tile_path] = [f"{idx}:v"]
+            continue
+        labels = [f"i{idx}_{k}" for k in range(uses[tile_path])]
+        filters.append(f"[{idx}:v]split={len(labels)}{''.join(f'[{label}]' for label in labels)}")
+        sources[tile_path] = labels
+    last_label = base_label
+    for i, (event, (tile_path, (x, y))) in enumerate(tiles):
+        if event.closed_end:
+            enable = f"between(t,{event.start:.4f},{event.end:.4f})"
+        else:
+            enable = f"gte(t,{event.start:.4f})*lt(t,{event.end:.4f})"
+        label = f"t{i + 1}"
+        filters.append(f"[{last_label}][{sources[tile_path].pop(0)}]overlay=x={x}:y={y}:enable='{enable}'[{label}]")
+        last_label = label
+    filters.append(f"[{last_label}]format=yuv420p[{out_label}]")
+    return filters
+
+@dataclass
+class RenderPlan:
+    """FFmpeg inputs plus a filter_complex graph that renders the whole edit in one pass"""
+    inputs: List[List[str]] = field(default_factory=list)
+    filters: List[str] = field(default_factory=list)
+    video_label: str = "vout"
+    audio_input: int = 0
+
+    def add_input(self, args: List[str]) -> int:
+        self.inputs.append(args)
+        return len(self.inputs) - 1
+
+    def input_args(self) -> List[str]:
+        return [arg for args in self.inputs for arg in args]
+
+    def filter_script(self) -> str:
+        return ';\n'.join(self.filters)
+
+def compile_render_plan(original_video: Path, specs: List[SegmentSpec], video_size: Tuple[int, int],
+                        fps: float, tiles: List[Tuple[TextEvent, Tuple[Path, Tuple[int, int]]]],
+                        frame_rate: str = None) -> RenderPlan:
+    """Compile segment specs and text tiles into a single filter graph.
+
+    Each original-video span gets its own input-seeked input rather than a
+    `split` of one decode, so concat never has to buffer frames for spans it
+    has not reached yet. Audio is taken, uninterrupted, from a separate input
+    of the original video.
+    """
+    plan = RenderPlan()
+    width, height = video_size
+    frame_rate = frame_rate or str(fps)
+    normalize = f"fps={frame_rate},scale={width}:{height},setsar=1,format=yuv420p"
+
+    concat_labels = []
+    for n, spec in enumerate(specs):
+        label = f"seg{n}"
+        if spec.kind == "video":
+            idx = plan.add_input(['-ss', f"{spec.start:.6f}", '-t', f"{spec.duration:.6f}", '-i', str(original_video)])
+            fades = video_fade_filter(spec.duration, spec.fade_in, spec.fade_out)
+            plan.filters.append(f"[{idx}:v]setpts=PTS-STARTPTS,{fades},{normalize}[{label}]")
+        else:
+            # Loop a little past the insert; trim makes the exact cut (split/overlay transitions drop the tail frame)
+            idx = plan.add_input(['-loop', '1', '-framerate', frame_rate, '-t', f"{spec.duration + 1:.6f}",
+                                  '-i', str(spec.image_path)])
+            transition = image_transition_filter(spec.transition, spec.duration, video_size, fps, label=str(n))
+            plan.filters.append(
+                f"[{idx}:v]scale={width}:{height}:flags=lanczos,setsar=1,{transition},"
+                f"{normalize},trim=duration={spec.duration:.6f},setpts=PTS-STARTPTS[{label}]"
+            )
+        concat_labels.append(f"[{label}]")
+
+    plan.audio_input = plan.add_input(['-i', str(original_video)])
+    if not concat_labels:
+        concat_labels = [f"[{plan.audio_input}:v]"]
+    plan.filters.append(f"{''.join(concat_labels)}concat=n={len(concat_labels)}:v=1:a=0[base]")
+
+    first_tile = len(plan.inputs)
+    for tile_path in tile_paths(tiles):
+        plan.add_input(['-i', str(tile_path)])
+    plan.filters.extend(overlay_filters(tiles, "base", first_tile, plan.video_label))
+    return plan
@@ -0,0 +1,223 @@
+"""Safe-zone lookup for text placement: precomputed maps or on-demand detection"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from ..config import settings
+from .face_detector import (GRID, FaceDetector, SafeZone, mask_unscanned_cells, roi_variant, score_zones_batch,
+                            zones_from_scores)
+from .frame_sampler import detection_size, probe_video, read_frames_at
+from ..utils.cache_manager import CacheManager
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__, settings.LOG_FILE, settings.LOG_LEVEL)
+
+N_CELLS = GRID * GRID
+
+class SafeZoneIndex:
+    """Safe zones over time as sorted timestamps plus an N x 9 score matrix.
+
+    Column c is grid cell (row, col) = divmod(c, 3), the layout
+    calculate_safe_zones uses. A NaN row means no zones are known for that
+    sample. All lookups are binary searches and vectorize over many queries.
+    """
+
+    def __init__(self, timestamps: np.ndarray, scores: np.ndarray, frame_size: Tuple[int, int]):
+        order = np.argsort(timestamps, kind='stable')
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)[order]
+        self.scores = np.asarray(scores, dtype=np.float64).reshape(-1, N_CELLS)[order]
+        self.frame_size = (int(frame_size[0]), int(frame_size[1]))
+
+    @classmethod
+    def from_map(cls, safe_zones_map: Dict[float, List[SafeZone]]) -> "SafeZoneIndex":
+        timestamps = np.array(list(safe_zones_map.keys()), dtype=np.float64)
+        scores = np.full((len(timestamps), N_CELLS), np.nan)
+        frame_size = (0, 0)
+        for i, zones in enumerate(safe_zones_map.values()):
+            for zone in zones:
+                if zone.width and zone.height:
+                    scores[i, (zone.y // zone.height) * GRID + zone.x // zone.width] = zone.score
+                    frame_size = (zone.width * GRID, zone.height * GRID)
+        return cls(timestamps, scores, frame_size)
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "SafeZoneIndex":
+        return cls(arrays['timestamps'], arrays['scores'], tuple(arrays['frame_size']))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {"timestamps": self.timestamps, "scores": self.scores, "frame_size": np.array(self.frame_size)}
+
+    def to_map(self) -> Dict[float, List[SafeZone]]:
+        return {float(t): self.zones(row) for t, row in zip(self.timestamps, self.scores)}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def nearest_rows(self, timestamps) -> np.ndarray:
+        """Row index of the nearest sample for each query timestamp"""
+        t = np.atleast_1d(np.asarray(timestamps, dtype=np.float64))
+        if len(self) == 1:
+            return np.zeros(len(t), dtype=np.intp)
+        right = np.clip(np.searchsorted(self.timestamps, t), 1, len(self) - 1)
+        left = right - 1
+        use_right = np.abs(self.timestamps[right] - t) < np.abs(t - self.timestamps[left])
+        return np.where(use_right, right, left)
+
+    def nearest(self, timestamps) -> np.ndarray:
+        """(k, 9) scores of the nearest sample to each timestamp"""
+        if not len(self):
+            return np.full((np.size(timestamps), N_CELLS), np.nan)
+        return self.scores[self.nearest_rows(timestamps)]
+
+    def interpolate(self, timestamps) -> np.ndarray:
+        """(k, 9) scores linearly interpolated between the samples around each timestamp"""
+        t = np.atleast_1d(np.asarray(timestamps, dtype=np.float64))
+        if len(self) < 2:
+            return self.nearest(t)
+        right = np.clip(np.searchsorted(self.timestamps, t), 1, len(self) - 1)
+        left = right - 1
+        span = self.timestamps[right] - self.timestamps[left]
+        weight = np.clip((t - self.timestamps[left]) / np.where(span > 0, span, 1.0), 0.0, 1.0)[:, None]
+        return self.scores[left] * (1 - weight) + self.scores[right] * weight
+
+    def windows(self, starts, ends, agg: str = "min") -> np.ndarray:
+        """(k, 9) scores aggregated ("min" or "mean") over the samples inside each [start, end].
+
+        Windows holding no sample fall back to the sample nearest their midpoint.
+        """
+        starts = np.atleast_1d(np.asarray(starts, dtype=np.float64))
+        ends = np.atleast_1d(np.asarray(ends, dtype=np.float64))
+        result = self.nearest((starts + ends) / 2)
+        if not len(self):
+            return result
+        lo = np.searchsorted(self.timestamps, starts, side='left')
+        hi = np.searchsorted(self.timestamps, ends, side='right')
+        filled = hi > lo
+        if not filled.any():
+            return result
+        if agg == "mean":
+            # Prefix sums turn every window mean into one subtraction (NaN rows contribute nothing)
+            valid = ~np.isnan(self.scores)
+            sums = np.vstack([np.zeros(N_CELLS), np.cumsum(np.where(valid, self.scores, 0.0), axis=0)])
+            counts = np.vstack([np.zeros(N_CELLS), np.cumsum(valid, axis=0)])
+            total = sums[hi[filled]] - sums[lo[filled]]
+            count = counts[hi[filled]] - counts[lo[filled]]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[filled] = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+        else:
+            # reduceat over [lo, hi) slices; fmin ignores NaN rows
+            bounds = np.column_stack([lo[filled], hi[filled]]).ravel()
+            padded = np.vstack([self.scores, np.full((1, N_CELLS), np.nan)])
+            reduced = np.fmin.reduceat(padded, bounds, axis=0)[::2]
+            result[filled] = reduced
+        return result
+
+    def zones(self, row: np.ndarray) -> List[SafeZone]:
+        """Zone list for one score row, ordered like calculate_safe_zones"""
+        return zones_from_scores(self.frame_size, row)
+
+    def zones_for(self, timestamps: Iterable[float]) -> Dict[float, List[SafeZone]]:
+        """Zones of the nearest sample to each timestamp"""
+        timestamps = list(timestamps)
+        if not timestamps:
+            return {}
+        return {t: self.zones(row) for t, row in zip(timestamps, self.nearest(timestamps))}
+
+    def zones_for_windows(self, windows: List[Tuple[float, float]], agg: str = "min") -> List[List[SafeZone]]:
+        """Per window, each cell's worst (min) or mean score across it; one vectorized query for all"""
+        if not windows:
+            return []
+        starts, ends = zip(*windows)
+        return [self.zones(row) for row in self.windows(starts, ends, agg)]
+
+class SafeZoneProvider:
+    """Detects faces only at the timestamps the assemblers query, memoized in the face cache.
+
+    With vote_neighbors = n, the frames n * SAFE_ZONE_VOTE_SPACING seconds
+    either side of a timestamp are detected too and the zone scores averaged,
+    so one missed or spurious detection cannot flip the text position.
+    """
+
+    def __init__(self, video_path: Path, detector: FaceDetector = None, cache: CacheManager = None,
+                 vote_neighbors: int = None, load_cached: bool = True):
+        self.video_path = Path(video_path)
+        self.detector = detector or FaceDetector(model=settings.FACE_DETECTION_MODEL)
+        self.cache = cache
+        self.vote_neighbors = settings.SAFE_ZONE_VOTE_NEIGHBORS if vote_neighbors is None else vote_neighbors
+        self.width, self.height, self.fps, self.total_frames = probe_video(self.video_path)
+        self.det_size = detection_size(self.width, self.height, settings.FACE_DETECTION_MAX_SIZE)
+        # Results depend on the voting setup and detection resolution; cache each combination separately
+        self._variant = (f"lazy_n{self.vote_neighbors}_{settings.SAFE_ZONE_VOTE_SPACING}s_"
+                         f"{settings.FACE_DETECTION_MAX_SIZE}px")
+        if roi_variant():
+            self._variant += f"_{roi_variant()}"
+        cached = cache.load_face_detection(str(self.video_path), self._variant) if cache and load_cached else None
+        self._scores: Dict[float, np.ndarray] = (
+            {float(t): row for t, row in zip(cached.timestamps, cached.scores)} if cached is not None else {}
+        )
+        self.detections = 0
+
+    @staticmethod
+    def _key(timestamp: float) -> float:
+        return round(timestamp, 3)
+
+    def zones_for(self, timestamps: Iterable[float]) -> Dict[float, List[SafeZone]]:
+        """Safe zones at each timestamp, detecting the ones not seen before in a single pass"""
+        timestamps = list(timestamps)
+        missing = sorted({self._key(t) for t in timestamps} - self._scores.keys())
+        if missing:
+            self._detect(missing)
+            if self.cache is not None:
+                self.cache.save_face_detection(str(self.video_path), self.to_index(), self._variant)
+        frame_size = (self.width, self.height)
+        return {t: zones_from_scores(frame_size, self._scores[self._key(t)]) for t in timestamps}
+
+    def zones_for_windows(self, windows: List[Tuple[float, float]], agg: str = "min") -> List[List[SafeZone]]:
+        """Zones at each window's midpoint; voting already covers its neighbourhood"""
+        mid_times = [(start + end) / 2 for start, end in windows]
+        zones_at = self.zones_for(mid_times)
+        return [zones_at[t] for t in mid_times]
+
+    def to_index(self) -> SafeZoneIndex:
+        """Everything detected so far as a SafeZoneIndex"""
+        timestamps = np.array(list(self._scores.keys()), dtype=np.float64)
+        scores = np.array(list(self._scores.values()), dtype=np.float64).reshape(-1, N_CELLS)
+        return SafeZoneIndex(timestamps, scores, (self.width, self.height))
+
+    def _frame_indices(self, timestamp: float) -> List[int]:
+        spacing = max(1, round(settings.SAFE_ZONE_VOTE_SPACING * self.fps))
+        last_frame = self.total_frames - 1 if self.total_frames > 0 else None
+        center = round(timestamp * self.fps)
+        indices = []
+        for k in range(-self.vote_neighbors, self.vote_neighbors + 1):
+            index = max(0, center + k * spacing)
+            if last_frame is not None:
+                index = min(index, last_frame)
+            if index not in indices:
+                indices.append(index)
+        return indices
+
+    def _detect(self, timestamps: List[float]):
+        wanted = {t: self._frame_indices(t) for t in timestamps}
+        frames = sorted({index for indices in wanted.values() for index in indices})
+        scale = (self.width / self.det_size[0], self.height / self.det_size[1])
+        detected, faces_per_frame = [], []
+        for index, gray in read_frames_at(self.video_path, frames, self.det_size):
+            detected.append(index)
+            faces_per_frame.append(self.detector.detect(gray, scale))
+        self.detections += len(detected)
+        row_of = {index: n for n, index in enumerate(detected)}
+        scores = mask_unscanned_cells(score_zones_batch((self.width, self.height), faces_per_frame), self.height)
+
+        for t, indices in wanted.items():
+            rows = [row_of[i] for i in indices if i in row_of]
+            # Voting: each cell's score averaged over the frames around t
+            self._scores[t] = scores[rows].mean(axis=0) if rows else np.full(N_CELLS, np.nan)
+        logger.info(f"On-demand face detection: {len(timestamps)} timestamps, {len(detected)} frames analyzed")
+
+def as_safe_zone_source(safe_zones):
+    """Accept a SafeZoneIndex, a SafeZoneProvider or a plain {timestamp: zones} map"""
+    if hasattr(safe_zones, 'zones_for_windows'):
+        return safe_zones
+    return SafeZoneIndex.from_map(safe_zones or {})
@@ -0,0 +1,83 @@
+"""Bounded worker pool for independent FFmpeg segment encodes"""
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from ..config import settings
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__, settings.LOG_FILE, settings.LOG_LEVEL)
+
+class SegmentRenderScheduler:
+    """Run segment jobs concurrently, return results in submission order, fail fast.
+
+    Jobs spawn FFmpeg through `run`, which tracks live processes so that the
+    first failure cancels queued jobs and terminates encodes still running.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max(1, max_workers or settings.FFMPEG_SEGMENT_WORKERS)
+        self._procs = set()
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self.timings: Dict[str, float] = {}
+        self.wall_seconds = 0.0
+
+    def run(self, cmd: List[str]) -> subprocess.CompletedProcess:
+        """subprocess.run(cmd, check=True, capture_output=True) that can be cancelled"""
+        # Checked and spawned under the lock cancel() takes, so no encode can start after its kill sweep
+        with self._lock:
+            if self._cancelled:
+                raise RuntimeError("Segment rendering cancelled")
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self._procs.add(proc)
+        try:
+            stdout, stderr = proc.communicate()
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, output=stdout, stderr=stderr)
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            procs = list(self._procs)
+        for proc in procs:
+            proc.kill()
+
+    def _timed(self, name: str, job: Callable):
+        start = time.perf_counter()
+        result = job()
+        self.timings[name] = time.perf_counter() - start
+        logger.info(f"Encoded {name} in {self.timings[name]:.2f}s")
+        return result
+
+    def map(self, jobs: Sequence[Tuple[str, Callable]]) -> List:
+        """Run (name, callable) jobs; results come back in the order the jobs were given"""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="segment") as pool:
+            futures = [pool.submit(self._timed, name, job) for name, job in jobs]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            failed = next((f for f in done if f.exception() is not None), None)
+            if failed is not None:
+                self.cancel()
+                for future in futures:
+                    future.cancel()
+                raise failed.exception()
+        self.wall_seconds = time.perf_counter() - start
+        return [future.result() for future in futures]
+
+    def stats(self) -> Dict:
+        encode_seconds = sum(self.timings.values())
+        return {
+            "segments": len(self.timings),
+            "workers": self.max_workers,
+            "segment_encode_seconds": {name: round(t, 2) for name, t in self.timings.items()},
+            "total_encode_seconds": round(encode_seconds, 2),
+            "wall_seconds": round(self.wall_seconds, 2),
+            "parallel_speedup": round(encode_seconds / self.wall_seconds, 2) if self.wall_seconds else 0.0
+        }
@@ -0,0 +1,80 @@
+"""Word-chunk schedule for animated text overlays"""
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from ..config import settings
+
+@dataclass
+class TextEvent:
+    start: float
+    end: float
+    text: str
+    font_size: int
+    sentiment: str
+    position: Tuple[int, int]
+    add_background: bool
+    closed_end: bool = False  # last state of a segment stays visible at `end`
+
+def staggered_text(words: List[str], words_per_chunk: int = None) -> str:
+    """Lay out words as staggered lines (stepping stones), one chunk per line"""
+    words_per_chunk = words_per_chunk or settings.TEXT_WORDS_PER_CHUNK
+    lines = []
+    for i in range(0, len(words), words_per_chunk):
+        line_words = words[i:i+words_per_chunk]
+        # Use spaces for indent (more visible)
+        indent_spaces = "      " * (i // words_per_chunk)
+        lines.append(indent_spaces + ' '.join(line_words))
+    return '\n'.join(lines)
+
+def visible_text(text: str, time_in_segment: float) -> str:
+    """Text shown `time_in_segment` seconds into a segment (words build up cumulatively)"""
+    words = text.split()
+    word_delay = settings.TEXT_WORD_DELAY
+    words_per_chunk = settings.TEXT_WORDS_PER_CHUNK
+    current_chunk = int(time_in_segment / word_delay)
+    total_words_to_show = min(len(words), (current_chunk + 1) * words_per_chunk)
+    if total_words_to_show <= 0:
+        return ""
+    return staggered_text(words[:total_words_to_show], words_per_chunk)
+
+def segment_style(segment: Dict) -> Tuple[int, str, bool]:
+    """Font size, sentiment and background flag for a text segment"""
+    sentiment = segment['data'].get('sentiment', 'neutral')
+    font_size_mod = segment['data'].get('font_size_modifier', 1.0)
+    font_size = int(settings.TEXT_FONT_SIZE * font_size_mod)
+    add_bg = sentiment != "neutral"  # No background for neutral
+    return font_size, sentiment, add_bg
+
+def build_text_events(text_segments: List[Dict], positions: Dict[int, Tuple[int, int]]) -> List[TextEvent]:
+    """Expand text segments into one event per distinct word-chunk state.
+
+    `positions` maps id(segment) to the fixed on-screen position of that segment.
+    Intermediate states cover [start, end); the final state of each segment
+    covers [start, end] so it matches the per-frame renderer.
+    """
+    word_delay = settings.TEXT_WORD_DELAY
+    words_per_chunk = settings.TEXT_WORDS_PER_CHUNK
+    events = []
+    for segment in text_segments:
+        words = segment['data'].get('text', '').split()
+        if not words:
+            continue
+        font_size, sentiment, add_bg = segment_style(segment)
+        n_states = -(-len(words) // words_per_chunk)
+        for chunk in range(n_states):
+            start = segment['start'] + chunk * word_delay
+            if start > segment['end']:
+                break
+            last = chunk == n_states - 1
+            end = segment['end'] if last else min(segment['start'] + (chunk + 1) * word_delay, segment['end'])
+            if end <= start and not last:
+                continue
+            events.append(TextEvent(
+                start=start, end=end,
+                text=staggered_text(words[:(chunk + 1) * words_per_chunk], words_per_chunk),
+                font_size=font_size, sentiment=sentiment,
+                position=positions[id(segment)], add_background=add_bg,
+                closed_end=last or end >= segment['end']
+            ))
+    events.sort(key=lambda e: e.start)
+    return events
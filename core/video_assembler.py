@@ -9,6 +9,7 @@ from moviepy import VideoFileClip, ImageClip, concatenate_videoclips, CompositeV
 from PIL import Image
 
 from ..config import settings
+from .safe_zones import as_safe_zone_source
 from ..utils.logger import setup_logger
 from ..utils.text_renderer import TextRenderer
 
@@ -118,6 +119,9 @@ class VideoAssembler:
         # Add text overlays with word-by-word animation and safe positioning
         if text_segments:
             text_clips = []
+            # Best zones across each segment's window, queried for all segments at once
+            zones_per_segment = as_safe_zone_source(safe_zones_map).zones_for_windows(
+                [(s['start'], s['end']) for s in text_segments])
             for i, segment in enumerate(text_segments):
                 text = segment['data'].get('text', '')
                 start = segment['start']
@@ -130,16 +134,7 @@ class VideoAssembler:
                 position_vert = segment['data'].get('position_vertical', 'bottom')
                 
                 # FIX: Use safe zones to avoid faces
-                timestamp = start + duration/2  # Middle of segment
-                safe_position = None
-                
-                if timestamp in safe_zones_map and safe_zones_map[timestamp]:
-                    # Use first safe zone
-                    safe_zone = safe_zones_map[timestamp][0]
-                    safe_position = (safe_zone.x + safe_zone.width // 2, safe_zone.y + safe_zone.height // 2)
-                else:
-                    # Default to bottom center
-                    safe_position = (video_size[0] // 2, int(video_size[1] * 0.75))
+                safe_position = self._get_safe_position(zones_per_segment[i], video_size)
                 
                 # Create word-by-word animated text
                 words = text.split()
@@ -190,6 +185,15 @@ class VideoAssembler:
         logger.info(f"Video assembly complete: {output_path}")
         return output_path
     
+    def _get_safe_position(self, zones: List, video_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Bottom center, or top center when a face covers the bottom one and the top is clearer"""
+        bottom_center = next((z for z in zones if z.x == z.width and z.y == 2 * z.height), None)
+        top_center = next((z for z in zones if z.x == z.width and z.y == 0), None)
+        if (bottom_center is not None and bottom_center.score < settings.SAFE_ZONE_THRESHOLD
+                and top_center is not None and top_center.score > bottom_center.score):
+            return (video_size[0] // 2, int(video_size[1] * settings.TEXT_POSITION_TOP))
+        return (video_size[0] // 2, int(video_size[1] * settings.TEXT_POSITION_BOTTOM))
+    
     def _add_text_overlays_moviepy(self, video, text_segments: List[Dict], safe_zones_map: Dict, output_path: Path) -> Path:
         """Add text overlays when no images"""
         if not text_segments:
@@ -1,31 +1,56 @@
 """FFmpeg-based video assembler with proper transitions and continuous audio"""
 import subprocess
 import shutil
-import cv2
+import tempfile
+import time
+from functools import partial
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Tuple
 from PIL import Image, ImageDraw, ImageFont
 
 from ..config import settings
+from .render_plan import (SMART_CUT_SEEK_NUDGE, SegmentSpec, compile_render_plan, image_transition_filter,
+                          overlay_filters, plan_segments, preceding_keyframe, smart_cut_encode_args,
+                          smart_cut_interior, smart_cut_mismatches, tile_paths, video_fade_filter)
+from .face_detector import SafeZone
+from .safe_zones import as_safe_zone_source
+from .segment_scheduler import SegmentRenderScheduler
+from .text_schedule import TextEvent, build_text_events, segment_style, visible_text
+from ..utils.cache_manager import CacheManager
+from ..utils.compositing import composite_tile
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__, settings.LOG_FILE, settings.LOG_LEVEL)
 
+DEFAULT_ENCODE_ARGS = ['-pix_fmt', 'yuv420p']
+
 class FFmpegVideoAssembler:
     """Video assembler using FFmpeg for transitions and OpenCV for text"""
     
-    def __init__(self):
+    def __init__(self, cache: CacheManager = None):
+        self.cache = cache
         self.temp_dir = settings.TEMP_DIR / "ffmpeg_assembly"
         self.temp_dir.mkdir(exist_ok=True, parents=True)
+        self.render_stats = {}
+        self._scheduler = None
+        self._encoder_threads = 0  # 0 = let libx264 pick
+        self._encode_args = DEFAULT_ENCODE_ARGS  # smart cut swaps in arguments matching the source
+        self._keyframes = {}
         logger.info("FFmpeg video assembler initialized")
     
+    def _run_segment_cmd(self, cmd: List[str]):
+        """Run a segment encode, through the active scheduler when encoding in parallel"""
+        if self._scheduler is not None:
+            return self._scheduler.run(cmd)
+        return subprocess.run(cmd, check=True, capture_output=True)
+    
     def get_video_info(self, video_path: Path) -> Dict:
         """Get video metadata using FFprobe"""
         cmd = [
             'ffprobe', '-v', 'error',
             '-select_streams', 'v:0',
-            '-show_entries', 'stream=width,height,r_frame_rate,duration',
+            '-show_entries', 'stream=codec_name,width,height,r_frame_rate,duration',
             '-of', 'json',
             str(video_path)
         ]
@@ -43,43 +68,151 @@ class FFmpegVideoAssembler:
             'width': int(stream['width']),
             'height': int(stream['height']),
             'fps': fps,
-            'duration': float(stream.get('duration', 0))
+            'frame_rate': stream['r_frame_rate'],
+            'duration': float(stream.get('duration', 0)),
+            'codec': stream.get('codec_name')
         }
     
+    def get_stream_params(self, video_path: Path) -> Dict:
+        """Codec parameters of the first video stream"""
+        cmd = [
+            'ffprobe', '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'stream=codec_name,profile,level,width,height,pix_fmt,time_base,'
+                             'r_frame_rate,avg_frame_rate',
+            '-of', 'json',
+            str(video_path)
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        import json
+        streams = json.loads(result.stdout).get('streams') or [{}]
+        return streams[0]
+    
+    def _prepare_smart_cut(self, video_path: Path, duration: float) -> bool:
+        """Enable smart cut only if a probe encode reproduces the source's stream parameters exactly"""
+        source = self.get_stream_params(video_path)
+        encode_args = smart_cut_encode_args(source)
+        if encode_args is None:
+            logger.warning("FFMPEG_SMART_CUT is on but unused: source is not constant-frame-rate H.264 "
+                           "with a known profile and level; re-encoding every segment")
+            return False
+        probe_path = self.temp_dir / "smart_cut_probe.mp4"
+        cmd = [
+            'ffmpeg', '-y', '-i', str(video_path), '-t', f"{min(1.0, duration):.3f}",
+            '-map', '0:v:0', '-an',
+            '-c:v', 'libx264', '-preset', 'fast', *encode_args,
+            str(probe_path)
+        ]
+        subprocess.run(cmd, check=True, capture_output=True)
+        try:
+            mismatches = smart_cut_mismatches(source, self.get_stream_params(probe_path))
+        finally:
+            probe_path.unlink(missing_ok=True)
+        if mismatches:
+            logger.warning(f"FFMPEG_SMART_CUT is on but unused: re-encoded pieces would differ from the source in "
+                           f"{', '.join(mismatches)}; re-encoding every segment")
+            return False
+        self._encode_args = encode_args
+        return True
+    
+    def get_keyframes(self, video_path: Path) -> List[float]:
+        """Sorted keyframe timestamps of the first video stream (from packet flags)"""
+        key = str(video_path)
+        if key not in self._keyframes and self.cache is not None:
+            cached = self.cache.load_keyframes(key)
+            if cached is not None:
+                self._keyframes[key] = cached
+        if key not in self._keyframes:
+            cmd = [
+                'ffprobe', '-v', 'error',
+                '-select_streams', 'v:0',
+                '-show_entries', 'packet=pts_time,flags',
+                '-of', 'csv=p=0',
+                str(video_path)
+            ]
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            keyframes = []
+            for line in result.stdout.splitlines():
+                pts_time, _, flags = line.partition(',')
+                if 'K' in flags and pts_time not in ('', 'N/A'):
+                    keyframes.append(float(pts_time))
+            self._keyframes[key] = sorted(keyframes)
+            logger.info(f"Indexed {len(keyframes)} keyframes in {video_path.name}")
+            if self.cache is not None:
+                self.cache.save_keyframes(key, self._keyframes[key])
+        return self._keyframes[key]
+    
     def create_video_segment_with_fade(self, video_path: Path, start: float, end: float, 
                                        output_path: Path, fade_in: bool = False, 
                                        fade_out: bool = False) -> Path:
         """Extract video segment with optional fade effects"""
         duration = end - start
-        fade_duration = 0.15
-        
-        # Build filter complex for fades
-        filters = []
-        if fade_in:
-            filters.append(f"fade=t=in:st={start}:d={fade_duration}")
-        if fade_out:
-            filters.append(f"fade=t=out:st={end-fade_duration}:d={fade_duration}")
         
-        filter_str = ','.join(filters) if filters else "null"
+        # Seek the input to the keyframe before `start` so only the remainder is decoded;
+        # timestamps then count from that keyframe, so the fades are rebased onto it
+        keyframe = preceding_keyframe(self.get_keyframes(video_path), start)
+        offset = start - keyframe
+        filter_str = video_fade_filter(duration, fade_in, fade_out, offset=offset)
         
         cmd = [
-            'ffmpeg', '-y', '-i', str(video_path),
-            '-ss', str(start), '-t', str(duration),
+            'ffmpeg', '-y',
+            '-ss', f"{keyframe:.6f}", '-i', str(video_path),
+            '-ss', f"{offset:.6f}", '-t', f"{duration:.6f}",
             '-vf', filter_str,
             '-an',  # No audio
-            '-c:v', 'libx264', '-preset', 'fast',
+            '-c:v', 'libx264', '-preset', 'fast', *self._encode_args,
+            '-threads', str(self._encoder_threads),
             str(output_path)
         ]
         
-        subprocess.run(cmd, check=True, capture_output=True)
+        self._run_segment_cmd(cmd)
         return output_path
     
+    def copy_video_range(self, video_path: Path, start: float, end: float, fps: float,
+                         output_path: Path) -> Path:
+        """Stream-copy a keyframe-aligned range of the video track without re-encoding"""
+        cmd = [
+            'ffmpeg', '-y',
+            # Nudge past the keyframe so the input seek cannot land on the previous one
+            '-ss', f"{start + SMART_CUT_SEEK_NUDGE:.6f}", '-i', str(video_path),
+            # A frame count (in decode order) stops exactly at the next keyframe;
+            # -t would let reordered B-frames from the following GOP slip in
+            '-frames:v', str(round((end - start) * fps)),
+            '-map', '0:v:0', '-an',
+            '-c:v', 'copy',
+            str(output_path)
+        ]
+        self._run_segment_cmd(cmd)
+        return output_path
+    
+    def create_video_segment_smart(self, video_path: Path, start: float, end: float, fps: float,
+                                   output_stem: str, fade_in: bool = False, fade_out: bool = False) -> List[Path]:
+        """Smart cut: re-encode only the GOP-aligned head and tail, stream-copy the interior"""
+        keyframes = self.get_keyframes(video_path)
+        interior = smart_cut_interior(start, end, fade_in, fade_out, keyframes, settings.SMART_CUT_MIN_COPY_SECONDS)
+        # The nudged input seek must still resolve to k1, not to a keyframe just after it
+        if interior is not None and any(interior[0] < k <= interior[0] + SMART_CUT_SEEK_NUDGE for k in keyframes):
+            interior = None
+        if interior is None:
+            output_path = self.temp_dir / f"{output_stem}.mp4"
+            return [self.create_video_segment_with_fade(video_path, start, end, output_path, fade_in, fade_out)]
+        
+        k1, k2 = interior
+        pieces = []
+        if k1 > start:
+            pieces.append(self.create_video_segment_with_fade(
+                video_path, start, k1, self.temp_dir / f"{output_stem}_head.mp4", fade_in=fade_in))
+        pieces.append(self.copy_video_range(video_path, k1, k2, fps, self.temp_dir / f"{output_stem}_copy.mp4"))
+        if end > k2:
+            pieces.append(self.create_video_segment_with_fade(
+                video_path, k2, end, self.temp_dir / f"{output_stem}_tail.mp4", fade_out=fade_out))
+        logger.info(f"Smart cut {start:.1f}s - {end:.1f}s: stream-copied {k2 - k1:.1f}s of {end - start:.1f}s")
+        return pieces
+    
     def create_image_segment_with_transition(self, image_path: Path, duration: float, 
                                              video_size: Tuple[int, int], fps: float,
                                              output_path: Path, transition_type: str = "fade") -> Path:
         """Create video from image with various transitions"""
-        trans_duration = 0.2
-        
         # Resize image to match video
         img = Image.open(image_path)
         img_resized = img.resize(video_size, Image.Resampling.LANCZOS)
@@ -87,22 +220,7 @@ class FFmpegVideoAssembler:
         img_resized.save(temp_img)
         
         # Choose transition filter based on type
-        if transition_type == "fade":
-            vf = f"fade=t=in:st=0:d={trans_duration},fade=t=out:st={duration-trans_duration}:d={trans_duration}"
-        elif transition_type == "slide_left":
-            # Slide from right to left
-            vf = f"split[main][tmp];[tmp]crop=iw:ih:0:0,fade=t=in:st=0:d={trans_duration}[fg];[main][fg]overlay=x='if(lt(t,{trans_duration}),W*(1-t/{trans_duration}),0)':y=0,fade=t=out:st={duration-trans_duration}:d={trans_duration}"
-        elif transition_type == "slide_right":
-            # Slide from left to right
-            vf = f"split[main][tmp];[tmp]crop=iw:ih:0:0,fade=t=in:st=0:d={trans_duration}[fg];[main][fg]overlay=x='if(lt(t,{trans_duration}),-W*(1-t/{trans_duration}),0)':y=0,fade=t=out:st={duration-trans_duration}:d={trans_duration}"
-        elif transition_type == "zoom":
-            # Zoom in effect
-            vf = f"zoompan=z='if(lt(time,{trans_duration}),1+(time/{trans_duration})*0.2,1.2)':d={int(duration*fps)}:s={video_size[0]}x{video_size[1]},fade=t=out:st={duration-trans_duration}:d={trans_duration}"
-        elif transition_type == "wipe":
-            # Wipe from top
-            vf = f"fade=t=in:st=0:d={trans_duration},fade=t=out:st={duration-trans_duration}:d={trans_duration}"
-        else:
-            vf = f"fade=t=in:st=0:d={trans_duration},fade=t=out:st={duration-trans_duration}:d={trans_duration}"
+        vf = image_transition_filter(transition_type, duration, video_size, fps)
         
         cmd = [
             'ffmpeg', '-y',
@@ -110,15 +228,23 @@ class FFmpegVideoAssembler:
             '-vf', vf,
             '-t', str(duration),
             '-r', str(fps),
-            '-c:v', 'libx264', '-preset', 'fast', '-pix_fmt', 'yuv420p',
+            '-c:v', 'libx264', '-preset', 'fast', *self._encode_args,
+            '-threads', str(self._encoder_threads),
             str(output_path)
         ]
         
-        subprocess.run(cmd, check=True, capture_output=True)
+        self._run_segment_cmd(cmd)
         return output_path
     
-    def concatenate_videos(self, video_paths: List[Path], output_path: Path) -> Path:
-        """Concatenate videos using FFmpeg concat demuxer"""
+    def concatenate_videos(self, video_paths: List[Path], output_path: Path,
+                           in_band_parameter_sets: bool = False) -> Path:
+        """Concatenate videos using FFmpeg concat demuxer.
+        
+        auto_convert joins H.264 as Annex B with each file's SPS/PPS in-band at its
+        keyframes, so pieces from different encoders decode with their own. With
+        in_band_parameter_sets the output is tagged avc3, which tells players the
+        parameter sets may change within the stream.
+        """
         concat_file = self.temp_dir / "concat_list.txt"
         
         with open(concat_file, 'w') as f:
@@ -126,9 +252,10 @@ class FFmpegVideoAssembler:
                 f.write(f"file '{vp.absolute()}'\n")
         
         cmd = [
-            'ffmpeg', '-y', '-f', 'concat', '-safe', '0',
+            'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-auto_convert', '1',
             '-i', str(concat_file),
             '-c', 'copy',
+            *(['-tag:v', 'avc3'] if in_band_parameter_sets else []),
             str(output_path)
         ]
         
@@ -151,129 +278,288 @@ class FFmpegVideoAssembler:
         subprocess.run(cmd, check=True, capture_output=True)
         return output_path
     
+    def _open_frame_reader(self, video_path: Path, stderr_log) -> subprocess.Popen:
+        """Decode the first video stream to raw BGR frames on stdout; diagnostics go to stderr_log"""
+        cmd = [
+            'ffmpeg', '-v', 'error', '-i', str(video_path),
+            '-map', '0:v:0', '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-'
+        ]
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_log)
+    
+    def _open_frame_writer(self, frame_size: Tuple[int, int], frame_rate: str,
+                           audio_source: Path, output_path: Path, stderr_log) -> subprocess.Popen:
+        """Encode raw BGR frames from stdin to the final codec, muxing audio from audio_source"""
+        cmd = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f"{frame_size[0]}x{frame_size[1]}", '-r', frame_rate,
+            '-i', '-',
+            '-i', str(audio_source),
+            '-map', '0:v:0', '-map', '1:a:0?',
+            '-c:v', settings.VIDEO_CODEC, '-preset', 'medium', '-crf', '23', '-pix_fmt', 'yuv420p',
+            '-c:a', 'copy',
+            '-shortest',
+            str(output_path)
+        ]
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr_log)
+    
+    @staticmethod
+    def _read_frame_into(stream, buffer: memoryview) -> bool:
+        """Fill buffer with exactly one frame from a raw pipe; False at end of stream"""
+        filled = 0
+        while filled < len(buffer):
+            n = stream.readinto(buffer[filled:])
+            if not n:
+                return False
+            filled += n
+        return True
+    
+    def _text_segment_positions(self, text_segments: List[Dict], safe_zones_map: Dict,
+                                frame_size: Tuple[int, int]) -> Dict[int, Tuple[int, int]]:
+        """Fixed position for each text segment, keyed by id(segment)"""
+        # FIX: Pre-calculate fixed position for each text segment (avoid jumping)
+        # Zones are judged across each segment's whole window, in one bulk query
+        windows = [(segment['start'], segment['end']) for segment in text_segments]
+        zones_per_segment = as_safe_zone_source(safe_zones_map).zones_for_windows(windows)
+        segment_positions = {}
+        for segment, zones in zip(text_segments, zones_per_segment):
+            segment_id = id(segment)
+            segment_positions[segment_id] = self._get_safe_position(zones, frame_size)
+            logger.debug(f"Text segment {segment['start']:.1f}-{segment['end']:.1f}: fixed position {segment_positions[segment_id]}")
+        return segment_positions
+    
+    def render_text_overlays(self, video_path: Path, text_segments: List[Dict],
+                             safe_zones_map: Dict, output_path: Path) -> Path:
+        """Render text overlays with the configured TEXT_OVERLAY_MODE"""
+        if settings.TEXT_OVERLAY_MODE == "ffmpeg":
+            return self.render_text_with_overlay_filters(video_path, text_segments, safe_zones_map, output_path)
+        return self.render_text_on_frames(video_path, text_segments, safe_zones_map, output_path)
+    
+    def render_text_with_overlay_filters(self, video_path: Path, text_segments: List[Dict],
+                                         safe_zones_map: Dict, output_path: Path) -> Path:
+        """Render word-by-word text entirely inside FFmpeg's filter graph.
+        
+        Each distinct word-chunk state is rendered once to a cropped PNG tile,
+        read by a single input and composited with an `overlay` filter gated by
+        `enable` on each time window it is shown, so no pixels pass through Python.
+        """
+        from ..utils.text_renderer import TextRenderer
+        
+        video_info = self.get_video_info(video_path)
+        frame_size = (video_info['width'], video_info['height'])
+        segment_positions = self._text_segment_positions(text_segments, safe_zones_map, frame_size)
+        events = build_text_events(text_segments, segment_positions)
+        
+        tiles = self._render_overlay_tiles(events, frame_size, TextRenderer())
+        if not tiles:
+            logger.info("No text to render, copying video")
+            shutil.copyfile(video_path, output_path)
+            return output_path
+        
+        inputs = []
+        for tile_path in tile_paths(tiles):
+            inputs.extend(['-i', str(tile_path)])
+        filters = overlay_filters(tiles, "0:v", 1, "vout")
+        
+        # Long graphs overflow command-line limits, so pass them as a script
+        filter_script = self.temp_dir / f"text_overlays_{output_path.stem}.txt"
+        filter_script.write_text(';\n'.join(filters), encoding='utf-8')
+        
+        cmd = [
+            'ffmpeg', '-y', '-i', str(video_path),
+            *inputs,
+            '-filter_complex_script', str(filter_script),
+            '-map', '[vout]', '-map', '0:a?',
+            '-c:v', settings.VIDEO_CODEC, '-preset', 'medium', '-crf', '23',
+            '-c:a', 'copy',
+            str(output_path)
+        ]
+        logger.info(f"Compositing {len(tiles)} text states from {len(inputs) // 2} tiles with FFmpeg overlay filters")
+        subprocess.run(cmd, check=True, capture_output=True)
+        return output_path
+    
+    def _render_overlay_tiles(self, events: List[TextEvent], frame_size: Tuple[int, int],
+                              text_renderer) -> List[Tuple[TextEvent, Tuple[Path, Tuple[int, int]]]]:
+        """Render each distinct text state once; returns (event, (tile_path, offset)) pairs"""
+        tile_dir = self.temp_dir / "text_tiles"
+        tile_dir.mkdir(exist_ok=True)
+        rendered = {}
+        tiles = []
+        for event in events:
+            key = (event.text, event.font_size, event.sentiment, event.position, event.add_background)
+            if key not in rendered:
+                tile_path = tile_dir / f"tile_{len(rendered)}.png"
+                offset = text_renderer.save_overlay_tile(
+                    event.text, tile_path, frame_size, event.position,
+                    font_size=event.font_size, sentiment=event.sentiment, add_background=event.add_background
+                )
+                rendered[key] = (tile_path, offset) if offset else None
+            if rendered[key]:
+                tiles.append((event, rendered[key]))
+        logger.info(f"Text schedule: {len(events)} events, {len(rendered)} distinct tiles")
+        return tiles
+    
     def render_text_on_frames(self, video_path: Path, text_segments: List[Dict], 
                               safe_zones_map: Dict, output_path: Path) -> Path:
-        """Render word-by-word animated text using OpenCV"""
+        """Render word-by-word animated text over raw frames piped through FFmpeg.
+        
+        Frames are decoded once from an ffmpeg rawvideo pipe and the composited
+        frames are encoded once, straight to the final codec, with the source
+        audio stream-copied in the same process.
+        """
         from ..utils.text_renderer import TextRenderer
         
         text_renderer = TextRenderer()
         
-        # Open video
-        cap = cv2.VideoCapture(str(video_path))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        # FIX: Pre-calculate fixed position for each text segment (avoid jumping)
-        segment_positions = {}
-        for segment in text_segments:
-            segment_id = id(segment)
-            # Use middle of segment for position calculation
-            mid_time = (segment['start'] + segment['end']) / 2
-            segment_positions[segment_id] = self._get_safe_position(mid_time, safe_zones_map, (width, height))
-            logger.debug(f"Text segment {segment['start']:.1f}-{segment['end']:.1f}: fixed position {segment_positions[segment_id]}")
-        
-        # Create writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        temp_output = self.temp_dir / f"temp_text_{output_path.name}"
-        out = cv2.VideoWriter(str(temp_output), fourcc, fps, (width, height))
+        video_info = self.get_video_info(video_path)
+        fps = video_info['fps']
+        width, height = video_info['width'], video_info['height']
+        total_frames = max(1, int(video_info['duration'] * fps))
         
-        frame_idx = 0
+        segment_positions = self._text_segment_positions(text_segments, safe_zones_map, (width, height))
         
-        logger.info(f"Rendering word-by-word text on {total_frames} frames")
+        # One reusable frame buffer shared by the decode and encode pipes
+        frame_buffer = bytearray(width * height * 3)
+        frame_view = memoryview(frame_buffer)
+        frame = np.frombuffer(frame_buffer, dtype=np.uint8).reshape(height, width, 3)
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        # stderr goes to temp files: a pipe nobody drains can fill up and stall ffmpeg mid-render
+        with tempfile.TemporaryFile() as reader_log, tempfile.TemporaryFile() as writer_log:
+            reader = self._open_frame_reader(video_path, reader_log)
+            writer = self._open_frame_writer((width, height), video_info['frame_rate'], video_path, output_path,
+                                             writer_log)
             
+            logger.info(f"Rendering word-by-word text on {total_frames} frames")
+            
+            try:
+                self._composite_text_frames(reader, writer, frame, frame_view, text_segments,
+                                            segment_positions, text_renderer, fps, total_frames)
+            except BrokenPipeError as e:
+                # The encoder exited early; its log says why
+                reader.kill()
+                if writer.wait() != 0:
+                    raise subprocess.CalledProcessError(writer.returncode, 'ffmpeg (encode)',
+                                                        stderr=_read_log(writer_log)) from e
+                raise
+            except BaseException:
+                reader.kill()
+                writer.kill()
+                raise
+            finally:
+                reader.stdout.close()
+            
+            writer.stdin.close()
+            writer.wait()
+            reader.wait()
+            if reader.returncode != 0:
+                raise subprocess.CalledProcessError(reader.returncode, 'ffmpeg (decode)', stderr=_read_log(reader_log))
+            if writer.returncode != 0:
+                raise subprocess.CalledProcessError(writer.returncode, 'ffmpeg (encode)', stderr=_read_log(writer_log))
+        
+        logger.info(f"Text overlay cache: {text_renderer.overlay_cache.stats()}")
+        return output_path
+    
+    def _composite_text_frames(self, reader: subprocess.Popen, writer: subprocess.Popen,
+                               frame: np.ndarray, frame_view: memoryview, text_segments: List[Dict],
+                               segment_positions: Dict, text_renderer, fps: float, total_frames: int):
+        """Pump frames from reader to writer, blending the active text onto each one"""
+        width, height = frame.shape[1], frame.shape[0]
+        frame_idx = 0
+        while self._read_frame_into(reader.stdout, frame_view):
             current_time = frame_idx / fps
             
             # Find which text segments are active and how many words to show
             for segment in text_segments:
                 if segment['start'] <= current_time <= segment['end']:
-                    text = segment['data'].get('text', '')
-                    sentiment = segment['data'].get('sentiment', 'neutral')
-                    font_size_mod = segment['data'].get('font_size_modifier', 1.0)
-                    
                     # FIX: Build up text cumulatively with stepping stone layout
-                    time_in_segment = current_time - segment['start']
-                    words = text.split()
-                    word_delay = settings.TEXT_WORD_DELAY
-                    words_per_chunk = settings.TEXT_WORDS_PER_CHUNK
+                    partial_text = visible_text(segment['data'].get('text', ''), current_time - segment['start'])
+                    if not partial_text:
+                        continue
+                    
+                    logger.debug(f"Text at {current_time:.1f}s: {repr(partial_text)}")
                     
-                    # Calculate how many words to show (cumulative)
-                    current_chunk = int(time_in_segment / word_delay)
-                    total_words_to_show = min(len(words), (current_chunk + 1) * words_per_chunk)
+                    # FIX: Use pre-calculated fixed position for entire segment
+                    safe_position = segment_positions[id(segment)]
                     
-                    if total_words_to_show > 0:
-                        # Build staggered multi-line text (stepping stones)
-                        visible_words = words[:total_words_to_show]
-                        
-                        # Create staggered lines with visual indent
-                        lines = []
-                        for i in range(0, len(visible_words), words_per_chunk):
-                            line_words = visible_words[i:i+words_per_chunk]
-                            # Use spaces for indent (more visible)
-                            indent_spaces = "      " * (i // words_per_chunk)
-                            lines.append(indent_spaces + ' '.join(line_words))
-                        
-                        partial_text = '\n'.join(lines)
-                        
-                        logger.debug(f"Text at {current_time:.1f}s: {repr(partial_text)}")
-                        
-                        # FIX: Use pre-calculated fixed position for entire segment
-                        safe_position = segment_positions[id(segment)]
-                        
-                        # Create text overlay with emotion-based background
-                        font_size = int(settings.TEXT_FONT_SIZE * font_size_mod)
-                        add_bg = sentiment != "neutral"  # No background for neutral
-                        text_img = text_renderer.create_text_image(
-                            partial_text, (width, height), safe_position,
-                            font_size=font_size, sentiment=sentiment, add_background=add_bg
-                        )
-                        
-                        if text_img:
-                            # Convert PIL to OpenCV
-                            text_overlay = np.array(text_img)
-                            text_overlay = cv2.cvtColor(text_overlay, cv2.COLOR_RGBA2BGRA)
-                            
-                            # Blend with frame
-                            alpha = text_overlay[:, :, 3] / 255.0
-                            for c in range(3):
-                                frame[:, :, c] = (1 - alpha) * frame[:, :, c] + alpha * text_overlay[:, :, c]
+                    # Text only changes every word_delay, so the rendered overlay is memoized
+                    font_size, sentiment, add_bg = segment_style(segment)
+                    tile = text_renderer.get_overlay(
+                        partial_text, (width, height), safe_position,
+                        font_size=font_size, sentiment=sentiment, add_background=add_bg
+                    )
+                    
+                    # Blend in place over the text's bounding box only
+                    if tile is not None:
+                        composite_tile(frame, tile)
             
-            out.write(frame)
+            writer.stdin.write(frame_view)
             frame_idx += 1
             
             if frame_idx % 100 == 0:
-                logger.info(f"Processed {frame_idx}/{total_frames} frames ({frame_idx*100//total_frames}%)")
-        
-        cap.release()
-        out.release()
-        
-        # Re-encode to proper format
-        cmd = [
-            'ffmpeg', '-y', '-i', str(temp_output),
-            '-c:v', 'libx264', '-preset', 'medium', '-crf', '23',
-            str(output_path)
-        ]
-        subprocess.run(cmd, check=True, capture_output=True)
-        
-        return output_path
+                logger.info(f"Processed {frame_idx}/{total_frames} frames ({min(100, frame_idx*100//total_frames)}%)")
     
-    def _get_safe_position(self, timestamp: float, safe_zones_map: Dict, 
-                          frame_size: Tuple[int, int]) -> Tuple[int, int]:
+    def _get_safe_position(self, zones: List[SafeZone], frame_size: Tuple[int, int]) -> Tuple[int, int]:
         """Get safe position - bottom area, avoiding faces"""
         # FIX: Use bottom 20% of frame for text, centered
         # This ensures text stays below faces even with multi-line staggered layout
+        bottom_center = next((z for z in zones if z.x == z.width and z.y == 2 * z.height), None)
+        top_center = next((z for z in zones if z.x == z.width and z.y == 0), None)
+        if (bottom_center is not None and bottom_center.score < settings.SAFE_ZONE_THRESHOLD
+                and top_center is not None and top_center.score > bottom_center.score):
+            # A face covers the bottom band and the (scanned) top band is clearer; move the text there
+            return (frame_size[0] // 2, int(frame_size[1] * settings.TEXT_POSITION_TOP))
         return (frame_size[0] // 2, int(frame_size[1] * 0.82))
     
+    def _render_segment(self, spec: SegmentSpec, original_video: Path, video_size: Tuple[int, int],
+                        fps: float, smart_cut: bool = False) -> List[Path]:
+        """Encode one planned segment; returns its file(s) in playback order"""
+        output_path = self.temp_dir / f"{spec.name}.mp4"
+        if spec.kind == "video":
+            logger.info(f"Creating video segment {spec.start:.1f}s - {spec.end:.1f}s")
+            if smart_cut:
+                return self.create_video_segment_smart(
+                    original_video, spec.start, spec.end, fps, spec.name,
+                    fade_in=spec.fade_in, fade_out=spec.fade_out
+                )
+            return [self.create_video_segment_with_fade(
+                original_video, spec.start, spec.end, output_path,
+                fade_in=spec.fade_in, fade_out=spec.fade_out
+            )]
+        logger.info(f"Creating image segment {spec.start:.1f}s - {spec.end:.1f}s with {spec.transition} transition")
+        return [self.create_image_segment_with_transition(
+            spec.image_path, spec.duration, video_size, fps, output_path, spec.transition
+        )]
+    
+    def _render_segments(self, specs: List[SegmentSpec], original_video: Path,
+                         video_size: Tuple[int, int], fps: float, smart_cut: bool = False) -> List[Path]:
+        """Encode all segments on a bounded worker pool; paths come back in timeline order"""
+        scheduler = SegmentRenderScheduler()
+        self._scheduler = scheduler
+        self._encoder_threads = settings.FFMPEG_THREADS_PER_WORKER if scheduler.max_workers > 1 else 0
+        logger.info(f"Encoding {len(specs)} segments with {scheduler.max_workers} workers "
+                    f"({self._encoder_threads or 'auto'} threads each)")
+        try:
+            segment_pieces = scheduler.map([
+                (spec.name, partial(self._render_segment, spec, original_video, video_size, fps, smart_cut))
+                for spec in specs
+            ])
+        finally:
+            self._scheduler = None
+            self._encoder_threads = 0
+        
+        stats = scheduler.stats()
+        self.render_stats.update({"mode": "segments", **stats})
+        logger.info(f"Segment encode: {stats['total_encode_seconds']}s of encoding in {stats['wall_seconds']}s wall "
+                    f"({stats['parallel_speedup']}x parallel speedup)")
+        return [path for pieces in segment_pieces for path in pieces]
+    
     def assemble_final_video(self, original_video: Path, timeline: List[Dict],
                             text_segments: List[Dict], safe_zones_map: Dict,
                             output_path: Path) -> Path:
         """Assemble final video with continuous audio, transitions, and word-by-word text"""
+        if settings.FFMPEG_ASSEMBLY_MODE == "single_pass":
+            return self.assemble_single_pass(original_video, timeline, text_segments, safe_zones_map, output_path)
+        
         logger.info("Starting FFmpeg-based video assembly")
         
         video_info = self.get_video_info(original_video)
@@ -286,52 +572,21 @@ class FFmpegVideoAssembler:
         subprocess.run(cmd, check=True, capture_output=True)
         logger.info("Extracted original audio")
         
-        # Get image segments
-        image_segments = [t for t in timeline if t['type'] in ['ai_image', 'custom_image']]
-        image_segments.sort(key=lambda x: x['start'])
-        
-        # Build video segments with varied transitions
-        segment_paths = []
-        current_time = 0.0
-        transitions = ["fade", "zoom", "slide_left", "slide_right", "wipe"]
-        
-        for i, img_seg in enumerate(image_segments):
-            # Video before image
-            if img_seg['start'] > current_time:
-                logger.info(f"Creating video segment {current_time:.1f}s - {img_seg['start']:.1f}s")
-                seg_path = self.temp_dir / f"video_seg_{i}.mp4"
-                self.create_video_segment_with_fade(
-                    original_video, current_time, img_seg['start'], seg_path,
-                    fade_in=(i==0), fade_out=True
-                )
-                segment_paths.append(seg_path)
-            
-            # Image segment with varied transitions
-            transition_type = transitions[i % len(transitions)]
-            logger.info(f"Creating image segment {img_seg['start']:.1f}s - {img_seg['end']:.1f}s with {transition_type} transition")
-            img_seg_path = self.temp_dir / f"image_seg_{i}.mp4"
-            self.create_image_segment_with_transition(
-                Path(img_seg['data']['image_path']),
-                img_seg['end'] - img_seg['start'],
-                video_size, fps, img_seg_path, transition_type
-            )
-            segment_paths.append(img_seg_path)
-            current_time = img_seg['end']
-        
-        # Remaining video
-        if current_time < video_info['duration']:
-            logger.info(f"Creating final video segment {current_time:.1f}s - {video_info['duration']:.1f}s")
-            seg_path = self.temp_dir / f"video_seg_final.mp4"
-            self.create_video_segment_with_fade(
-                original_video, current_time, video_info['duration'], seg_path,
-                fade_in=True, fade_out=False
-            )
-            segment_paths.append(seg_path)
+        # Build video segments with varied transitions; segments are independent until concat
+        specs = plan_segments(timeline, video_info['duration'])
+        # Smart cut copies source packets next to our own encodes, so every encode must match the source
+        self._encode_args = DEFAULT_ENCODE_ARGS
+        smart_cut = settings.FFMPEG_SMART_CUT and self._prepare_smart_cut(original_video, video_info['duration'])
+        try:
+            segment_paths = self._render_segments(specs, original_video, video_size, fps, smart_cut)
+        finally:
+            self._encode_args = DEFAULT_ENCODE_ARGS
+        self.render_stats["smart_cut"] = smart_cut
         
         # Concatenate all segments
         logger.info("Concatenating video segments")
         video_no_audio = self.temp_dir / "concatenated_no_audio.mp4"
-        self.concatenate_videos(segment_paths, video_no_audio)
+        self.concatenate_videos(segment_paths, video_no_audio, in_band_parameter_sets=smart_cut)
         
         # Add continuous audio
         logger.info("Adding continuous audio")
@@ -340,8 +595,57 @@ class FFmpegVideoAssembler:
         
         # Render word-by-word text overlays
         logger.info("Rendering word-by-word text overlays")
-        self.render_text_on_frames(video_with_audio, text_segments, safe_zones_map, output_path)
+        self.render_text_overlays(video_with_audio, text_segments, safe_zones_map, output_path)
+        
+        logger.info(f"✓ Final video assembled: {output_path}")
+        return output_path
+    
+    def assemble_single_pass(self, original_video: Path, timeline: List[Dict],
+                             text_segments: List[Dict], safe_zones_map: Dict,
+                             output_path: Path) -> Path:
+        """Assemble the whole edit with one FFmpeg invocation and a single final encode.
+        
+        Trims, image inserts with transitions, concat, continuous original audio
+        and text overlays are compiled into one filter_complex graph, so there
+        are no intermediate segment files and no generation loss.
+        """
+        from ..utils.text_renderer import TextRenderer
+        
+        logger.info("Starting single-pass FFmpeg assembly")
+        
+        video_info = self.get_video_info(original_video)
+        video_size = (video_info['width'], video_info['height'])
+        
+        specs = plan_segments(timeline, video_info['duration'])
+        segment_positions = self._text_segment_positions(text_segments, safe_zones_map, video_size)
+        events = build_text_events(text_segments, segment_positions)
+        tiles = self._render_overlay_tiles(events, video_size, TextRenderer())
+        
+        plan = compile_render_plan(original_video, specs, video_size, video_info['fps'], tiles,
+                                   frame_rate=video_info['frame_rate'])
+        filter_script = self.temp_dir / f"render_plan_{output_path.stem}.txt"
+        filter_script.write_text(plan.filter_script(), encoding='utf-8')
+        
+        cmd = [
+            'ffmpeg', '-y',
+            *plan.input_args(),
+            '-filter_complex_script', str(filter_script),
+            '-map', f"[{plan.video_label}]", '-map', f"{plan.audio_input}:a:0?",
+            '-r', video_info['frame_rate'],
+            '-c:v', settings.VIDEO_CODEC, '-preset', 'medium', '-crf', '23',
+            '-c:a', 'copy',
+            '-shortest',
+            str(output_path)
+        ]
+        logger.info(f"Rendering {len(specs)} segments and {len(tiles)} text states in one pass")
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, capture_output=True)
+        self.render_stats.update({"mode": "single_pass", "segments": len(specs),
+                                  "wall_seconds": round(time.perf_counter() - start, 2)})
         
         logger.info(f"✓ Final video assembled: {output_path}")
         return output_path
 
+def _read_log(log) -> bytes:
+    log.seek(0)
+    return log.read()
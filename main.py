@@ -1,26 +1,45 @@
 """Main CLI interface for Video Editor Automation - WITH ALL FIXES"""
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
 
 from .config import settings
 from .utils.logger import setup_logger, log_section
 from .utils.cache_manager import CacheManager
 from .core.audio_processor import AudioProcessor
 from .core.content_analyzer import ContentAnalyzer
-from .core.face_detector import FaceDetector
+from .core.face_detector import FaceDetector, roi_variant
+from .core.safe_zones import SafeZoneIndex, SafeZoneProvider
 from .core.image_generator import ImageGenerator
 from .core.timeline_manager import TimelineManager
 from .core.video_assembler import VideoAssembler
+from .core.video_assembler_ffmpeg import FFmpegVideoAssembler
 
 logger = setup_logger(__name__, settings.LOG_FILE, settings.LOG_LEVEL)
 
 class VideoEditorCLI:
     def __init__(self, api_key: str = None):
         self.api_key = api_key or settings.OPENAI_API_KEY
-        self.cache = CacheManager(settings.CACHE_DIR)
+        self.cache = CacheManager(settings.CACHE_DIR, image_reuse_threshold=settings.IMAGE_REUSE_THRESHOLD)
         logger.info("Video Editor Automation initialized")
     
+    def _image_for_analysis(self, image_generator: ImageGenerator, analysis: dict, skip_cache: bool) -> Optional[Path]:
+        """Cached or freshly generated image for one analysis result"""
+        prompt = analysis.get('image_prompt')
+        if not prompt:
+            return None
+        segment_id = analysis['segment_id']
+        cached_image = None if skip_cache else self.cache.load_image(prompt)
+        if cached_image:
+            logger.info(f"Using cached image for segment {segment_id}")
+            return cached_image
+        image_path = image_generator.generate_from_analysis(analysis)
+        if image_path and settings.IMAGE_CACHE_ENABLED:
+            return self.cache.save_image(prompt, image_path)
+        return image_path
+    
     def process_video(self, video_path: Path, skip_cache: bool = False) -> Path:
         log_section(logger, f"Processing Video: {video_path.name}")
         
@@ -28,20 +47,29 @@ class VideoEditorCLI:
         log_section(logger, "Phase 1: Audio Extraction & Translation")
         audio_processor = AudioProcessor(api_key=self.api_key)
         
-        cached_transcription = None if skip_cache else self.cache.load_transcription(str(video_path))
+        # Transcripts depend on the uploaded audio, so each extraction/VAD setup is cached separately
+        # (plain file extraction without VAD keeps the original cache entry)
+        variant_parts = [] if settings.AUDIO_EXTRACTION_MODE == "file" else [settings.AUDIO_EXTRACTION_MODE]
+        if settings.VAD_ENABLED:
+            variant_parts.append("vad")
+        transcription_variant = "_".join(variant_parts) or None
+        cached_transcription = None if skip_cache else self.cache.load_transcription(str(video_path), transcription_variant)
         if cached_transcription:
             logger.info("Using cached transcription")
             transcription_data = cached_transcription
         else:
-            audio_path = audio_processor.extract_audio(video_path)
-            try:
-                translation = audio_processor.translate_to_english(audio_path)
-                transcription_data = {"hindi": None, "english": translation}
-            finally:
-                if audio_path.exists():
-                    audio_path.unlink()
+            if settings.AUDIO_EXTRACTION_MODE == "speech":
+                translation = audio_processor.translate_to_english(audio_processor.extract_speech_audio(video_path))
+            else:
+                audio_path = audio_processor.extract_audio(video_path)
+                try:
+                    translation = audio_processor.translate_to_english(audio_path)
+                finally:
+                    if audio_path.exists():
+                        audio_path.unlink()
+            transcription_data = {"hindi": None, "english": translation}
             if settings.CACHE_TRANSCRIPTION:
-                self.cache.save_transcription(str(video_path), transcription_data)
+                self.cache.save_transcription(str(video_path), transcription_data, transcription_variant)
         
         english_segments = transcription_data['english']['segments']
         if not english_segments:
@@ -53,56 +81,81 @@ class VideoEditorCLI:
         
         # Phase 2: Content Analysis (FIX: max 5 images per 2 minutes)
         log_section(logger, "Phase 2: Content Analysis")
-        content_analyzer = ContentAnalyzer(api_key=self.api_key)
+        content_analyzer = ContentAnalyzer(
+            api_key=self.api_key,
+            cache=self.cache if settings.CACHE_ANALYSIS else None,
+            load_cached=not skip_cache
+        )
         
-        if english_segments:
-            visualization_results = content_analyzer.batch_analyze_segments(english_segments)
-        else:
-            visualization_results = []
-        logger.info(f"Found {len(visualization_results)} segments needing visualization")
+        # Images for results that are certain to be selected start generating while analysis continues
+        image_generator = ImageGenerator(api_key=self.api_key)
+        image_pool = ThreadPoolExecutor(max_workers=max(1, settings.IMAGE_GENERATION_WORKERS), thread_name_prefix="image")
+        image_jobs = {}
         
-        # Phase 3: Face Detection
-        log_section(logger, "Phase 3: Face Detection & Safe Zones")
-        face_detector = FaceDetector(model=settings.FACE_DETECTION_MODEL)
+        def start_image(analysis):
+            if analysis['segment_id'] not in image_jobs:
+                image_jobs[analysis['segment_id']] = image_pool.submit(
+                    self._image_for_analysis, image_generator, analysis, skip_cache)
         
-        cached_face_data = None if skip_cache else self.cache.load_face_detection(str(video_path))
-        if cached_face_data:
-            logger.info("Using cached face detection data")
-            safe_zones_map = cached_face_data
-        else:
-            safe_zones_map = face_detector.process_video(video_path)
-            if settings.CACHE_FACE_DETECTION:
-                self.cache.save_face_detection(str(video_path), safe_zones_map)
+        try:
+            on_selected = start_image if settings.IMAGE_GENERATION_EARLY_START else None
+            text_summaries = None
+            if not english_segments:
+                visualization_results = []
+            elif settings.ANALYSIS_MODE == "fused":
+                # One request per phrase also yields the Phase 5 overlay captions
+                visualization_results, text_summaries = content_analyzer.analyze_phrases(
+                    phrases, english_segments, on_selected=on_selected)
+            else:
+                visualization_results = content_analyzer.batch_analyze_segments(english_segments, on_selected=on_selected)
+            early_starts = len(image_jobs)
+            logger.info(f"Found {len(visualization_results)} segments needing visualization")
         
-        # Phase 4: Image Generation
-        log_section(logger, "Phase 4: Image Generation")
-        image_generator = ImageGenerator(api_key=self.api_key)
+            # Phase 3: Face Detection
+            log_section(logger, "Phase 3: Face Detection & Safe Zones")
+            face_detector = FaceDetector(model=settings.FACE_DETECTION_MODEL)
         
-        generated_images = {}
-        for analysis in visualization_results:
-            prompt = analysis.get('image_prompt')
-            if not prompt:
-                continue
-            segment_id = analysis['segment_id']
-            cached_image = None if skip_cache else self.cache.load_image(prompt)
-            if cached_image:
-                logger.info(f"Using cached image for segment {segment_id}")
-                generated_images[segment_id] = cached_image
+            if settings.FACE_DETECTION_MODE == "lazy":
+                # Detection runs during assembly, only at the timestamps text is placed at
+                logger.info("Safe zones will be detected on demand at text segment midpoints")
+                safe_zones_map = SafeZoneProvider(
+                    video_path, face_detector,
+                    cache=self.cache if settings.CACHE_FACE_DETECTION else None,
+                    load_cached=not skip_cache
+                )
             else:
-                image_path = image_generator.generate_from_analysis(analysis)
-                if image_path and settings.IMAGE_CACHE_ENABLED:
-                    cached_path = self.cache.save_image(prompt, image_path)
-                    generated_images[segment_id] = cached_path
-                elif image_path:
-                    generated_images[segment_id] = image_path
-        logger.info(f"Generated/cached {len(generated_images)} images")
+                # Zones computed under a different detection restriction are not reusable
+                face_variant = roi_variant()
+                cached_face_data = None if skip_cache else self.cache.load_face_detection(str(video_path), face_variant)
+                if cached_face_data:
+                    logger.info("Using cached face detection data")
+                    safe_zones_map = cached_face_data
+                else:
+                    safe_zones_map = SafeZoneIndex(*face_detector.process_video_scores(video_path))
+                    if settings.CACHE_FACE_DETECTION:
+                        self.cache.save_face_detection(str(video_path), safe_zones_map, face_variant)
+        
+            # Phase 4: Image Generation
+            log_section(logger, "Phase 4: Image Generation")
+            for analysis in visualization_results:
+                start_image(analysis)
+            generated_images = {}
+            for analysis in visualization_results:
+                image_path = image_jobs[analysis['segment_id']].result()
+                if image_path:
+                    generated_images[analysis['segment_id']] = image_path
+        finally:
+            # Queued generations are dropped if analysis, detection or a generation fails
+            image_pool.shutdown(cancel_futures=True)
+        logger.info(f"Generated/cached {len(generated_images)} images ({early_starts} started during analysis)")
         
         # Phase 5: Timeline Management (FIX: 1 second per image)
         log_section(logger, "Phase 5: Timeline Management")
         timeline_manager = TimelineManager()
         
-        for phrase in phrases:
-            text_data = content_analyzer.summarize_for_text_overlay(phrase)
+        if text_summaries is None:
+            text_summaries = content_analyzer.batch_summarize_for_text_overlay(phrases)
+        for phrase, text_data in zip(phrases, text_summaries):
             display_text = text_data.get('english_text', phrase.get('text', ''))
             
             # Add styling metadata
@@ -127,7 +180,10 @@ class VideoEditorCLI:
         stats = timeline_manager.get_statistics()
         logger.info(f"Timeline stats: {stats}")
         
-        video_assembler = VideoAssembler()
+        if settings.VIDEO_ASSEMBLER == "moviepy":
+            video_assembler = VideoAssembler()
+        else:
+            video_assembler = FFmpegVideoAssembler(cache=self.cache)
         video_info = video_assembler.get_video_info(video_path)
         render_timeline = timeline_manager.build_render_timeline(video_info['duration'])
         
@@ -148,12 +204,44 @@ class VideoEditorCLI:
         
         # Generate report
         report_path = settings.OUTPUT_DIR / f"{video_path.stem}_report.txt"
+        render_stats = getattr(video_assembler, 'render_stats', {})
+        analysis_stats = content_analyzer.request_stats()
+        analysis_cache_stats = content_analyzer.cache_stats()
+        # Similar-prompt reuse is reported apart from exact hits: it is what IMAGE_REUSE_THRESHOLD saves
+        image_cache_stats = {"exact_hits": self.cache.image_hits["exact"],
+                             "generations_avoided": self.cache.image_hits["similar"]}
+        face_stats = dict(face_detector.detection_stats)
+        if isinstance(safe_zones_map, SafeZoneProvider):
+            face_stats["on_demand_detections"] = safe_zones_map.detections
         with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(f"Video Editor Automation - Processing Report\\n{'='*60}\\n\\n")
-            f.write(f"Input: {video_path.name}\\nOutput: {output_path.name}\\n\\n")
-            f.write(f"Timeline Stats:\\n")
+            f.write(f"Video Editor Automation - Processing Report\n{'='*60}\n\n")
+            f.write(f"Input: {video_path.name}\nOutput: {output_path.name}\n\n")
+            f.write(f"Timeline Stats:\n")
             for k, v in stats.items():
-                f.write(f"- {k}: {v}\\n")
+                f.write(f"- {k}: {v}\n")
+            if audio_processor.vad_stats:
+                f.write(f"\nVoice Activity:\n")
+                for k, v in audio_processor.vad_stats.items():
+                    f.write(f"- {k}: {v}\n")
+            if analysis_stats:
+                f.write(f"\nAnalysis Requests:\n")
+                for k, v in analysis_stats.items():
+                    f.write(f"- {k}: {v}\n")
+            if analysis_cache_stats:
+                f.write(f"\nAnalysis Cache:\n")
+                for k, v in analysis_cache_stats.items():
+                    f.write(f"- {k}: {v}\n")
+            f.write(f"\nImage Cache:\n")
+            for k, v in image_cache_stats.items():
+                f.write(f"- {k}: {v}\n")
+            if face_stats:
+                f.write(f"\nFace Detection Stats:\n")
+                for k, v in face_stats.items():
+                    f.write(f"- {k}: {v}\n")
+            if render_stats:
+                f.write(f"\nRender Stats:\n")
+                for k, v in render_stats.items():
+                    f.write(f"- {k}: {v}\n")
         
         return final_video
 
@@ -181,10 +269,10 @@ def main():
     
     try:
         output_video = cli.process_video(args.input, skip_cache=args.skip_cache)
-        print(f"\\n✓ Success! Output video: {output_video}\\n")
+        print(f"\n✓ Success! Output video: {output_video}\n")
     except Exception as e:
         logger.error(f"Processing failed: {e}", exc_info=True)
-        print(f"\\n✗ Error: {e}\\n")
+        print(f"\n✗ Error: {e}\n")
         sys.exit(1)
 
 if __name__ == '__main__':
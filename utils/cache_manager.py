@@ -1,13 +1,20 @@
 """Cache manager for storing processed data"""
 import json
+import os
 import pickle
 import hashlib
+import tempfile
+import threading
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, List, Optional
 from datetime import datetime
 
+import numpy as np
+
+from .prompt_index import PromptIndex
+
 class CacheManager:
-    def __init__(self, cache_dir: Path):
+    def __init__(self, cache_dir: Path, image_reuse_threshold: float = 1.0):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
@@ -15,22 +22,34 @@ class CacheManager:
         self.analysis_dir = self.cache_dir / "analysis"
         self.images_dir = self.cache_dir / "images"
         self.face_detection_dir = self.cache_dir / "face_detection"
+        self.keyframes_dir = self.cache_dir / "keyframes"
         
-        for dir_path in [self.transcription_dir, self.analysis_dir, self.images_dir, self.face_detection_dir]:
+        for dir_path in [self.transcription_dir, self.analysis_dir, self.images_dir, self.face_detection_dir,
+                         self.keyframes_dir]:
             dir_path.mkdir(exist_ok=True)
+        
+        # Below 1.0, load_image falls back to the cached image of the most similar prompt
+        self.image_reuse_threshold = image_reuse_threshold
+        self._image_lock = threading.Lock()
+        self._prompt_index = None
+        self.image_hits = {"exact": 0, "similar": 0}
     
     def _generate_key(self, identifier: str) -> str:
         return hashlib.md5(identifier.encode()).hexdigest()
     
-    def save_transcription(self, video_path: str, transcription_data: dict):
+    def _transcription_file(self, video_path: str, variant: str = None) -> Path:
+        # Variants (e.g. VAD-trimmed uploads) keep their own file next to the plain transcription
         key = self._generate_key(video_path)
-        cache_file = self.transcription_dir / f"{key}.json"
+        suffix = f"_{variant}" if variant else ""
+        return self.transcription_dir / f"{key}{suffix}.json"
+    
+    def save_transcription(self, video_path: str, transcription_data: dict, variant: str = None):
+        cache_file = self._transcription_file(video_path, variant)
         with open(cache_file, 'w', encoding='utf-8') as f:
             json.dump({"video_path": video_path, "timestamp": datetime.now().isoformat(), "data": transcription_data}, f, ensure_ascii=False, indent=2)
     
-    def load_transcription(self, video_path: str) -> Optional[dict]:
-        key = self._generate_key(video_path)
-        cache_file = self.transcription_dir / f"{key}.json"
+    def load_transcription(self, video_path: str, variant: str = None) -> Optional[dict]:
+        cache_file = self._transcription_file(video_path, variant)
         if not cache_file.exists():
             return None
         with open(cache_file, 'r', encoding='utf-8') as f:
@@ -41,38 +60,132 @@ class CacheManager:
         key = self._generate_key(image_prompt)
         cached_path = self.images_dir / f"{key}{image_path.suffix}"
         shutil.copy2(image_path, cached_path)
+        with self._image_lock:
+            signature = self._get_prompt_index().add(key, image_prompt)
         metadata_path = self.images_dir / f"{key}.json"
         with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump({"prompt": image_prompt, "timestamp": datetime.now().isoformat()}, f, ensure_ascii=False, indent=2)
+            json.dump({"prompt": image_prompt, "timestamp": datetime.now().isoformat(),
+                       "minhash": signature.tolist()}, f, ensure_ascii=False, indent=2)
         return cached_path
     
-    def load_image(self, image_prompt: str) -> Optional[Path]:
-        key = self._generate_key(image_prompt)
+    def _find_image(self, key: str) -> Optional[Path]:
         for ext in ['.png', '.jpg', '.jpeg', '.webp']:
             cached_path = self.images_dir / f"{key}{ext}"
             if cached_path.exists():
                 return cached_path
         return None
     
-    def save_face_detection(self, video_path: str, detection_data: dict):
+    def load_image(self, image_prompt: str, similarity_threshold: float = None) -> Optional[Path]:
+        """Image cached for this prompt, else for the most similar cached prompt at or above the threshold"""
+        threshold = self.image_reuse_threshold if similarity_threshold is None else similarity_threshold
+        cached_path = self._find_image(self._generate_key(image_prompt))
+        if cached_path:
+            with self._image_lock:
+                self.image_hits["exact"] += 1
+            return cached_path
+        if threshold >= 1.0:
+            return None
+        with self._image_lock:
+            match = self._get_prompt_index().query(image_prompt, threshold)
+        cached_path = self._find_image(match[0]) if match else None
+        if cached_path:
+            with self._image_lock:
+                self.image_hits["similar"] += 1
+        return cached_path
+    
+    def _get_prompt_index(self) -> PromptIndex:
+        # Built on first use from the prompts (and stored signatures) in the image metadata files
+        if self._prompt_index is None:
+            self._prompt_index = PromptIndex()
+            for metadata_path in self.images_dir.glob("*.json"):
+                try:
+                    with open(metadata_path, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+                    self._prompt_index.add(metadata_path.stem, metadata["prompt"], metadata.get("minhash"))
+                except (OSError, ValueError, KeyError):
+                    continue
+        return self._prompt_index
+    
+    def analysis_key(self, template: str, model: str, temperature: float, messages: List[dict]) -> str:
+        """Key for a chat reply: the prompt template, model, temperature and the rendered messages"""
+        identifier = json.dumps({"template": template, "model": model, "temperature": temperature,
+                                 "messages": messages}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(identifier.encode()).hexdigest()
+    
+    def save_analysis(self, key: str, result: dict):
+        # Write-then-rename so concurrent writers and interrupted runs never leave a torn file
+        fd, tmp_path = tempfile.mkstemp(dir=self.analysis_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"timestamp": datetime.now().isoformat(), "data": result}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.analysis_dir / f"{key}.json")
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+    
+    def load_analysis(self, key: str) -> Optional[dict]:
+        cache_file = self.analysis_dir / f"{key}.json"
+        if not cache_file.exists():
+            return None
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)["data"]
+    
+    def _face_detection_file(self, video_path: str, variant: str = None, ext: str = ".npz") -> Path:
+        # Variants (e.g. on-demand detection) keep their own file next to the full-video index
         key = self._generate_key(video_path)
-        cache_file = self.face_detection_dir / f"{key}.pkl"
-        with open(cache_file, 'wb') as f:
-            pickle.dump(detection_data, f)
+        suffix = f"_{variant}" if variant else ""
+        return self.face_detection_dir / f"{key}{suffix}{ext}"
+    
+    def save_face_detection(self, video_path: str, detection_data, variant: str = None):
+        """Store a SafeZoneIndex (or a {timestamp: zones} map, converted) as numpy arrays"""
+        from ..core.safe_zones import SafeZoneIndex
+        if not isinstance(detection_data, SafeZoneIndex):
+            detection_data = SafeZoneIndex.from_map(detection_data)
+        cache_file = self._face_detection_file(video_path, variant)
+        np.savez(cache_file, **detection_data.to_arrays())
+    
+    def load_face_detection(self, video_path: str, variant: str = None):
+        """SafeZoneIndex for the video, or None; legacy pickled maps are converted on load"""
+        from ..core.safe_zones import SafeZoneIndex
+        cache_file = self._face_detection_file(video_path, variant)
+        if cache_file.exists():
+            with np.load(cache_file) as arrays:
+                return SafeZoneIndex.from_arrays(arrays)
+        legacy_file = self._face_detection_file(video_path, variant, ext=".pkl")
+        if not legacy_file.exists():
+            return None
+        with open(legacy_file, 'rb') as f:
+            return SafeZoneIndex.from_map(pickle.load(f))
     
-    def load_face_detection(self, video_path: str) -> Optional[dict]:
+    def _file_signature(self, video_path: str) -> dict:
+        stat = Path(video_path).stat()
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+    
+    def save_keyframes(self, video_path: str, keyframes: List[float]):
+        key = self._generate_key(video_path)
+        cache_file = self.keyframes_dir / f"{key}.json"
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({"video_path": video_path, "timestamp": datetime.now().isoformat(),
+                       "source": self._file_signature(video_path), "data": keyframes}, f)
+    
+    def load_keyframes(self, video_path: str) -> Optional[List[float]]:
         key = self._generate_key(video_path)
-        cache_file = self.face_detection_dir / f"{key}.pkl"
+        cache_file = self.keyframes_dir / f"{key}.json"
         if not cache_file.exists():
             return None
-        with open(cache_file, 'rb') as f:
-            return pickle.load(f)
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        # The index is only valid for the exact file it was built from
+        if cached.get("source") != self._file_signature(video_path):
+            return None
+        return cached["data"]
     
     def get_cache_info(self) -> dict:
         return {
             "transcriptions": len(list(self.transcription_dir.glob("*.json"))),
             "analysis": len(list(self.analysis_dir.glob("*.json"))),
             "images": len(list(self.images_dir.glob("*.png"))) + len(list(self.images_dir.glob("*.jpg"))),
-            "face_detection": len(list(self.face_detection_dir.glob("*.pkl")))
+            "face_detection": len(list(self.face_detection_dir.glob("*.npz"))) + len(list(self.face_detection_dir.glob("*.pkl"))),
+            "keyframes": len(list(self.keyframes_dir.glob("*.json")))
         }
 
@@ -0,0 +1,82 @@
+"""Alpha compositing of pre-rendered overlays onto video frames"""
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+@dataclass
+class OverlayTile:
+    """Overlay cropped to its visible bounding box, stored premultiplied.
+
+    `premultiplied` holds round(bgr * alpha / 255) and `inv_alpha` holds
+    255 - alpha, so blending a frame region is
+    premultiplied + region * inv_alpha / 255 in integer arithmetic.
+    """
+    x: int
+    y: int
+    premultiplied: np.ndarray  # (h, w, 3) uint8, BGR
+    inv_alpha: np.ndarray      # (h, w, 1) uint16
+    _acc: np.ndarray = field(default=None, repr=False)
+    _carry: np.ndarray = field(default=None, repr=False)
+
+    def __post_init__(self):
+        # Scratch buffers are reused for every frame the tile is blended on
+        shape = self.premultiplied.shape
+        self._acc = np.empty(shape, dtype=np.uint16)
+        self._carry = np.empty(shape, dtype=np.uint16)
+
+    @property
+    def width(self) -> int:
+        return self.premultiplied.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.premultiplied.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.premultiplied.nbytes + self.inv_alpha.nbytes + self._acc.nbytes + self._carry.nbytes
+
+def make_overlay_tile(bgra: np.ndarray) -> Optional[OverlayTile]:
+    """Crop a full-frame BGRA overlay to its non-transparent pixels; None if fully transparent"""
+    alpha = bgra[:, :, 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(alpha.any(axis=0))
+    y0, y1 = int(rows[0]), int(rows[-1]) + 1
+    x0, x1 = int(cols[0]), int(cols[-1]) + 1
+
+    crop = bgra[y0:y1, x0:x1].astype(np.uint16)
+    a = crop[:, :, 3:4]
+    premultiplied = ((crop[:, :, :3] * a + 127) // 255).astype(np.uint8)
+    inv_alpha = np.ascontiguousarray(255 - a)
+    return OverlayTile(x0, y0, premultiplied, inv_alpha)
+
+def composite_tile(frame: np.ndarray, tile: OverlayTile) -> np.ndarray:
+    """Blend a tile onto a uint8 BGR frame in place, touching only the tile's region"""
+    frame_h, frame_w = frame.shape[:2]
+    x0, y0 = max(tile.x, 0), max(tile.y, 0)
+    x1, y1 = min(tile.x + tile.width, frame_w), min(tile.y + tile.height, frame_h)
+    if x0 >= x1 or y0 >= y1:
+        return frame
+
+    region = frame[y0:y1, x0:x1]
+    if (x1 - x0, y1 - y0) == (tile.width, tile.height):
+        premultiplied, inv_alpha, acc, carry = tile.premultiplied, tile.inv_alpha, tile._acc, tile._carry
+    else:
+        # Tile hangs off the frame edge; blend the visible part only
+        ty, tx = slice(y0 - tile.y, y1 - tile.y), slice(x0 - tile.x, x1 - tile.x)
+        premultiplied, inv_alpha = tile.premultiplied[ty, tx], tile.inv_alpha[ty, tx]
+        acc, carry = tile._acc[ty, tx], tile._carry[ty, tx]
+
+    # region * inv_alpha / 255 with rounding: (v + 128 + ((v + 128) >> 8)) >> 8
+    np.multiply(region, inv_alpha, out=acc, dtype=np.uint16)
+    acc += 128
+    np.right_shift(acc, 8, out=carry)
+    acc += carry
+    acc >>= 8
+    acc += premultiplied
+    np.minimum(acc, 255, out=acc)
+    np.copyto(region, acc, casting='unsafe')
+    return frame
@@ -0,0 +1,89 @@
+"""MinHash/LSH index over image prompts for near-duplicate cache lookups"""
+import hashlib
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard nearly always share a bucket
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+
+STOPWORDS = frozenset("""
+a an the and or of in on at to for with from by as is are be being was were this that these those it its
+into onto over under while showing shows show image picture photo depicting featuring style detailed
+""".split())
+
+def normalize_tokens(prompt: str) -> FrozenSet[str]:
+    """Lowercased word set without stopwords, short words or plural s"""
+    tokens = set()
+    for word in re.findall(r"[a-z0-9]+", prompt.lower()):
+        if len(word) <= 2 or word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.add(word)
+    return frozenset(tokens)
+
+def minhash(tokens: Iterable[str]) -> np.ndarray:
+    """NUM_PERM-value MinHash signature of a token set"""
+    hashes = np.array([int.from_bytes(hashlib.blake2b(t.encode(), digest_size=4).digest(), "little") % _PRIME
+                       for t in tokens], dtype=np.uint64)
+    if not len(hashes):
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    # a < 2^31 and h < 2^31 keep a * h inside uint64
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0  # a prompt with no content words is similar to nothing
+    return len(a & b) / len(a | b)
+
+class PromptIndex:
+    """LSH buckets of prompt signatures; candidates are confirmed with the exact token Jaccard.
+
+    Prompts with no tokens left after normalization are never indexed or matched.
+    """
+
+    def __init__(self):
+        self.tokens: Dict[str, FrozenSet[str]] = {}
+        self.buckets: Dict[Tuple[int, bytes], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def add(self, key: str, prompt: str, signature: Optional[np.ndarray] = None) -> np.ndarray:
+        """Index a prompt under `key`; returns its signature for storing next to the image"""
+        tokens = normalize_tokens(prompt)
+        signature = minhash(tokens) if signature is None else np.asarray(signature, dtype=np.uint64)
+        if not tokens:
+            return signature
+        if key not in self.tokens:
+            for band in range(BANDS):
+                self.buckets.setdefault(self._band_key(signature, band), []).append(key)
+        self.tokens[key] = tokens
+        return signature
+
+    def query(self, prompt: str, threshold: float) -> Optional[Tuple[str, float]]:
+        """(key, similarity) of the most similar indexed prompt at or above threshold, or None"""
+        tokens = normalize_tokens(prompt)
+        if not tokens:
+            return None
+        signature = minhash(tokens)
+        candidates = set()
+        for band in range(BANDS):
+            candidates.update(self.buckets.get(self._band_key(signature, band), ()))
+        best = None
+        for key in sorted(candidates):
+            similarity = jaccard(tokens, self.tokens[key])
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    @staticmethod
+    def _band_key(signature: np.ndarray, band: int) -> Tuple[int, bytes]:
+        return band, signature[band * ROWS:(band + 1) * ROWS].tobytes()
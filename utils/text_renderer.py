@@ -1,6 +1,9 @@
 """Text rendering for video overlays"""
+from collections import OrderedDict
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Hashable
+
+import numpy as np
 
 try:
     from PIL import Image, ImageDraw, ImageFont
@@ -8,15 +11,61 @@ except ImportError:
     Image = ImageDraw = ImageFont = None
 
 from ..config import settings
+from ..utils.compositing import OverlayTile, make_overlay_tile
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__, settings.LOG_FILE, settings.LOG_LEVEL)
 
+_MISSING = object()
+
+class OverlayCache:
+    """Bounded LRU cache of rendered overlays with hit/miss/eviction counters"""
+    
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max(1, max_entries or settings.TEXT_OVERLAY_CACHE_SIZE)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable, default=None):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return default
+    
+    def put(self, key: Hashable, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
 class TextRenderer:
-    def __init__(self):
+    def __init__(self, overlay_cache_size: int = None):
         if Image is None:
             raise ImportError("Pillow required. Install: pip install Pillow")
         self.font_path = self._get_font_path()
+        self._fonts = {}
+        self.overlay_cache = OverlayCache(overlay_cache_size)
         logger.info(f"Text renderer initialized with font: {self.font_path}")
     
     def _get_font_path(self) -> Optional[Path]:
@@ -31,6 +80,15 @@ class TextRenderer:
                 return Path(font_path)
         return None
     
+    def _load_font(self, font_size: int):
+        """Load (and memoize) the truetype font for a given size"""
+        if font_size not in self._fonts:
+            if self.font_path:
+                self._fonts[font_size] = ImageFont.truetype(str(self.font_path), font_size)
+            else:
+                self._fonts[font_size] = ImageFont.truetype("arial.ttf", font_size)
+        return self._fonts[font_size]
+    
     def create_text_image(self, text: str, frame_size: Tuple[int, int], position: Tuple[int, int] = None,
                          font_size: int = None, text_color: Tuple[int, int, int] = None,
                          stroke_color: Tuple[int, int, int] = None, stroke_width: int = None,
@@ -48,14 +106,7 @@ class TextRenderer:
         draw = ImageDraw.Draw(img)
         
         try:
-            if self.font_path:
-                font = ImageFont.truetype(str(self.font_path), font_size)
-            else:
-                try:
-                    font = ImageFont.truetype("arial.ttf", font_size)
-                except:
-                    logger.warning("No Unicode font, skipping text")
-                    return img
+            font = self._load_font(font_size)
         except Exception as e:
             logger.warning(f"Font load failed: {e}, skipping text")
             return img
@@ -112,6 +163,34 @@ class TextRenderer:
         
         return img
     
+    def get_overlay(self, text: str, frame_size: Tuple[int, int], position: Tuple[int, int] = None,
+                    font_size: int = None, sentiment: str = "neutral",
+                    add_background: bool = True) -> Optional[OverlayTile]:
+        """Return a ready-to-blend overlay tile, rendering it only on a cache miss"""
+        font_size = font_size or settings.TEXT_FONT_SIZE
+        key = (text, font_size, sentiment, position, tuple(frame_size), add_background)
+        tile = self.overlay_cache.get(key, _MISSING)
+        if tile is _MISSING:
+            img = self.create_text_image(text, frame_size, position, font_size=font_size,
+                                         sentiment=sentiment, add_background=add_background)
+            # PIL gives RGBA; swap to BGRA once here instead of per frame
+            tile = make_overlay_tile(np.asarray(img)[:, :, [2, 1, 0, 3]])
+            self.overlay_cache.put(key, tile)
+        return tile
+    
+    def save_overlay_tile(self, text: str, output_path: Path, frame_size: Tuple[int, int],
+                          position: Tuple[int, int] = None, font_size: int = None,
+                          sentiment: str = "neutral", add_background: bool = True) -> Optional[Tuple[int, int]]:
+        """Save the overlay cropped to its visible pixels; returns its (x, y) offset in the frame"""
+        img = self.create_text_image(text, frame_size, position, font_size=font_size,
+                                     sentiment=sentiment, add_background=add_background)
+        bbox = img.getchannel('A').getbbox()
+        if bbox is None:
+            return None
+        img.crop(bbox).save(output_path)
+        logger.debug(f"Overlay tile saved: {output_path.name} at {bbox[:2]}")
+        return bbox[0], bbox[1]
+    
     def save_text_overlay(self, text: str, output_path: Path, **kwargs) -> Path:
         img = self.create_text_image(text, **kwargs)
         if img: